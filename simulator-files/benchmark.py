@@ -0,0 +1,157 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from game import BatchHexatron, Hexatron
+
+
+def choose_move(game, idx, rng):
+    """Choose a random legal move, or go straight if there is none.
+
+    Args:
+        game (Hexatron): The game.
+        idx (int): The index of the player.
+        rng (random.Random): The random generator.
+
+    Returns:
+        move (int): An integer in [-2,2].
+    """
+
+    legal = game.legal_moves(idx)
+    moves = [move for move in range(-2, 3) if legal >> (move + 2) & 1]
+    return rng.choice(moves) if moves else 0
+
+
+def benchmark_engine(size, bitboard, observation, games, seed):
+    """Measure the throughput of `Hexatron` in one configuration.
+
+    Every configuration plays the same games: the starts and the moves are
+    drawn from generators seeded with `seed`.
+
+    Args:
+        size (int): Size of the (outer) square grid.
+        bitboard (bool): See `Hexatron`.
+        observation (str): See `Hexatron`.
+        games (int): Number of games to play.
+        seed (int): The seed.
+
+    Returns:
+        result (dict): The number of calls per second of `reset`, `act` and
+            `_get_observation`, and the number of steps per second of full
+            games, including the choice of the moves. The observations are
+            timed with their board, which bitboard games only build when it
+            is read.
+    """
+
+    game = Hexatron(size, bitboard=bitboard, observation=observation)
+    rng = random.Random(seed)
+
+    reset_time = act_time = observation_time = 0
+    steps = 0
+
+    t_games = time.perf_counter()
+    for idx in range(games):
+        t0 = time.perf_counter()
+        game.reset(seed=seed + idx)
+        reset_time += time.perf_counter() - t0
+
+        done = False
+        while not done:
+            move1 = choose_move(game, 0, rng)
+            move2 = choose_move(game, 1, rng)
+
+            t0 = time.perf_counter()
+            _, done, _ = game.act(move1, move2)
+            act_time += time.perf_counter() - t0
+            steps += 1
+
+            t0 = time.perf_counter()
+            game._get_observation()['board']
+            observation_time += time.perf_counter() - t0
+    game_time = time.perf_counter() - t_games - observation_time
+
+    return {
+        'size': size,
+        'engine': 'bitboard' if bitboard else 'grid',
+        'observation': observation,
+        'games': games,
+        'steps': steps,
+        'reset_per_second': games / reset_time,
+        'act_per_second': steps / act_time,
+        'observation_per_second': steps / observation_time,
+        'game_steps_per_second': steps / game_time}
+
+
+def benchmark_batch(size, num_games, steps, seed):
+    """Measure the throughput of `BatchHexatron`, with random moves.
+
+    Args:
+        size (int): Size of the (outer) square grid.
+        num_games (int): Number of games that are played simultaneously.
+        steps (int): Number of steps of all games.
+        seed (int): The seed.
+
+    Returns:
+        result (dict): The number of game steps per second.
+    """
+
+    game = BatchHexatron(num_games, size)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(-1, 2, size=[steps, num_games, 2])
+
+    game.reset(seed=seed)
+    t0 = time.perf_counter()
+    for step in range(steps):
+        game.act(actions[step])
+    elapsed = time.perf_counter() - t0
+
+    return {
+        'size': size,
+        'engine': 'batch',
+        'games': num_games,
+        'steps': steps * num_games,
+        'game_steps_per_second': steps * num_games / elapsed}
+
+
+def main(argv):
+    """Script starting point.
+
+    Args:
+        argv (list): List of command-line arguments.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='python[3] simulator-files/benchmark.py',
+        description='Measure the throughput of the game engine.')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=list(range(9, 27, 2)))
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=1024,
+                        help='number of games of BatchHexatron')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this file')
+    args = parser.parse_args(argv[1:])
+
+    results = []
+    for size in args.sizes:
+        for bitboard in [False, True]:
+            for observation in Hexatron.OBSERVATIONS:
+                results.append(benchmark_engine(
+                    size, bitboard, observation, args.games, args.seed))
+        results.append(benchmark_batch(size, args.batch, 100, args.seed))
+
+    output = json.dumps(results, indent=2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as outfile:
+            outfile.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
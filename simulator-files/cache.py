@@ -0,0 +1,151 @@
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
+
+# The version of the results, see `tournament.play_game`. Results of another
+# version are not served from the cache.
+VERSION = 3
+
+# The modules of the game engine, see `hash_engine`
+ENGINE = ('game', 'topology', 'symmetry')
+
+
+def hash_agent(agent):
+    """Return the file of an agent, and the hash of its source.
+
+    Args:
+        agent (str): The module name of the agent.
+
+    Returns:
+        path (str): The file of the agent.
+        digest (str): The SHA-256 of the file.
+    """
+
+    spec = importlib.util.find_spec(agent)
+    if spec is None:
+        raise ValueError('Unknown agent "{}".'.format(agent))
+
+    with open(spec.origin, 'rb') as infile:
+        return spec.origin, hashlib.sha256(infile.read()).hexdigest()
+
+
+def hash_engine():
+    """Return the hash of the source of the game engine, so that results
+    are played again when the rules change.
+
+    Returns:
+        digest (str): The SHA-256 of the files of `ENGINE`.
+    """
+
+    digest = hashlib.sha256()
+    for module in ENGINE:
+        with open(importlib.util.find_spec(module).origin, 'rb') as infile:
+            digest.update(infile.read())
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, path='cache/results.sqlite3'):
+        """Constructor. Opens an on-disk cache of the results of games,
+        creating it if needed.
+
+        A result is keyed by everything that decides it: the source of the
+        engine and of both agents, the start, the seed of the agents, the
+        size, and the rules of the run. Editing an agent thus only
+        invalidates its own games.
+
+        Args:
+            path (str): The file of the cache, an SQLite database.
+        """
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results '
+            '(key TEXT PRIMARY KEY, result TEXT NOT NULL)')
+
+        # hashes[agent]: the hash of the source of an agent
+        self.hashes = {}
+        self.engine = hash_engine()
+
+    def hash_agent(self, agent):
+        """Return the hash of the source of an agent, once per cache.
+
+        Args:
+            agent (str): The module name of the agent.
+
+        Returns:
+            digest (str): The SHA-256 of the agent's file.
+        """
+
+        if agent not in self.hashes:
+            _, self.hashes[agent] = hash_agent(agent)
+
+        return self.hashes[agent]
+
+    def key(self, agents, start, seed, size, adjudicate, deadline):
+        """Return the key of a game.
+
+        Args:
+            agents (tuple): The module names of player 1 and player 2.
+            start (tuple): One of `Hexatron.STARTS`.
+            seed (int): The seed of the agents.
+            size (int): Size of the (outer) square grid.
+            adjudicate (bool): See `tournament.play_game`.
+            deadline (float): See `tournament.play_game`.
+
+        Returns:
+            key (str): The key.
+        """
+
+        inputs = [VERSION, self.engine,
+                  [self.hash_agent(agent) for agent in agents],
+                  [int(value) for value in start], seed, size,
+                  bool(adjudicate), deadline]
+        return hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+
+    def get(self, key):
+        """Return a cached result.
+
+        Args:
+            key (str): The key of the game, see `key`.
+
+        Returns:
+            result (dict): The result, see `tournament.play_game`, or None if
+                the game is not in the cache.
+        """
+
+        row = self.connection.execute(
+            'SELECT result FROM results WHERE key = ?', (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key, result):
+        """Add a result to the cache. Results are only written to disk by
+        `commit`.
+
+        Args:
+            key (str): The key of the game, see `key`.
+            result (dict): The result, see `tournament.play_game`.
+        """
+
+        self.connection.execute(
+            'INSERT OR REPLACE INTO results VALUES (?, ?)',
+            (key, json.dumps(result)))
+
+    def commit(self):
+        """Write the results added so far to disk."""
+
+        self.connection.commit()
+
+    def close(self):
+        """Write all results to disk, and close the cache."""
+
+        self.commit()
+        self.connection.close()
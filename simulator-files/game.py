@@ -1,20 +1,24 @@
+import collections.abc
+import functools
+import itertools
+import struct
+
 import numpy as np
 
+from symmetry import MATRICES
+from topology import MOVES, STEPS, get_topology
+
 
 class Status:
     VALID = 0
     CRASHED_INTO_WALL = 1
     CRASHED_INTO_OPPONENT = 2
+    CRASHED_HEAD_ON = 3
 
 
 class Player:
 
-    STEPS = [(-1, 0),  # NW
-             (-1, 1),  # NE
-             (0, 1),   # E
-             (1, 0),   # SE
-             (1, -1),  # SW
-             (0, -1)]  # W
+    STEPS = STEPS
 
     def __init__(self, y, x, orientation):
         """Constructor.
@@ -29,8 +33,10 @@ class Player:
         self.x = x
         self.orientation = int(orientation)
 
-        self.trajectory = [{
-            'x': self.x, 'y': self.y, 'orientation': self.orientation}]
+        # The trajectory is recorded as the start, and the orientation after
+        # every step, see `trajectory`
+        self.start = (y, x, self.orientation)
+        self.orientations = bytearray()
 
     def act(self, action):
         """Rotate according to `action`, and move 1 step forward.
@@ -49,8 +55,38 @@ class Player:
         self.y += dy
         self.x += dx
 
-        self.trajectory.append({
-            'x': self.x, 'y': self.y, 'orientation': self.orientation})
+        self.orientations.append(self.orientation)
+
+    def undo(self):
+        """Undo the last call to `act`."""
+
+        dy, dx = Player.STEPS[self.orientations.pop()]
+        self.y -= dy
+        self.x -= dx
+        self.orientation = (
+            self.orientations[-1] if self.orientations else self.start[2])
+
+    @property
+    def trajectory(self):
+        """The positions and orientations of the player, from the start up
+        to now. The list is built on every access, so only use it for
+        replays.
+
+        Returns:
+            trajectory (list): A list of dicts, containing the `x`, `y` and
+                `orientation` of the player after every step.
+        """
+
+        y, x, orientation = self.start
+        trajectory = [{'x': x, 'y': y, 'orientation': orientation}]
+
+        for orientation in self.orientations:
+            dy, dx = Player.STEPS[orientation]
+            y += dy
+            x += dx
+            trajectory.append({'x': x, 'y': y, 'orientation': orientation})
+
+        return trajectory
 
     def frontal_crash(self, other):
         """Check if this player's head collides
@@ -67,82 +103,709 @@ class Player:
         return frontal_crash
 
 
+_ZOBRIST = {}
+
+
+def get_zobrist(size, num_players=2):
+    """Return the random tables for Zobrist hashing the playing field,
+    building them once per size and number of players. A fixed seed keeps
+    the keys identical between processes and runs.
+
+    Args:
+        size (int): Size of the (outer) square grid.
+        num_players (int): The number of players.
+
+    Returns:
+        trails (list): For every player, a list of 64-bit keys, one per
+            cell of the trail.
+        heads (list): For every player, a list of 64-bit keys, one per
+            cell, plus a last one for a head outside the playing field.
+        orientations (list): For every player, a list of 6 64-bit keys, one
+            per orientation.
+    """
+
+    if (size, num_players) not in _ZOBRIST:
+        num_cells = get_topology(size).num_cells
+        rng = np.random.default_rng(size)
+
+        def draw(*shape):
+            return rng.integers(
+                np.iinfo(np.uint64).max, size=shape, dtype=np.uint64,
+                endpoint=True).tolist()
+
+        _ZOBRIST[size, num_players] = (
+            draw(num_players, num_cells),
+            draw(num_players, num_cells + 1),
+            draw(num_players, 6))
+
+    return _ZOBRIST[size, num_players]
+
+
+def get_rotations(num_players=2):
+    """Return how far every player's start is rotated around the center of
+    the playing field, relative to player 1.
+
+    Args:
+        num_players (int): The number of players.
+
+    Returns:
+        rotations (list): For every player, the rotation in sixths of a
+            turn, see `symmetry.MATRICES`.
+    """
+
+    return [idx * 6 // num_players for idx in range(num_players)]
+
+
+def get_starts(num_players=2):
+    """Return all distinct starts, see `Hexatron.reset`.
+
+    Args:
+        num_players (int): The number of players.
+
+    Returns:
+        starts (list): A list of tuples `(vertical_distance,
+            horizontal_distance, orientation1, ..., orientationN)`.
+    """
+
+    orientations = [[(orientation + rotation) % 6 for orientation in [1, 2]]
+                    for rotation in get_rotations(num_players)]
+    return list(itertools.product(range(4), range(4), *orientations))
+
+
+def get_snapshot_format(num_players=2):
+    """Return the `struct` format of the header of a snapshot: the size,
+    the number of players, the turn, and the Y, X and state of every player.
+    The state holds the orientation in its low bits, and the status from
+    bit 4 on. The trails follow the header.
+
+    Args:
+        num_players (int): The number of players.
+
+    Returns:
+        format (str): The format.
+    """
+
+    return '<BBH' + 'hhB' * num_players
+
+
+def rotate(observation, idx):
+    """Return an observation as seen by another player: its own layer,
+    position, orientation and moves come first, followed by those of the
+    next players in turn.
+
+    Args:
+        observation (dict): See `Hexatron._get_observation`.
+        idx (int): The index of the player.
+
+    Returns:
+        observation (dict): The rotated observation.
+    """
+
+    num_players = len(observation['positions'])
+    order = list(range(idx, num_players)) + list(range(idx))
+
+    return {
+        'board': observation['board'][:, :, order],
+        'positions': tuple(observation['positions'][i] for i in order),
+        'orientations': tuple(observation['orientations'][i] for i in order),
+        'moves': tuple(observation['moves'][i] for i in order)}
+
+
+class Observation(collections.abc.Mapping):
+
+    def __init__(self, build, **fields):
+        """Constructor. Creates an observation whose board is only built the
+        first time it is read, which spares a bitboard game from building
+        the board on every step.
+
+        Args:
+            build (function): Returns the board, called at most once.
+            fields (dict): The other fields, see `Hexatron._get_observation`.
+        """
+
+        self.build = build
+        self.fields = fields
+
+    def __getitem__(self, key):
+        if key == 'board' and key not in self.fields:
+            self.fields[key] = self.build()
+        return self.fields[key]
+
+    def __iter__(self):
+        yield 'board'
+        yield from (key for key in self.fields if key != 'board')
+
+    def __len__(self):
+        return len(self.fields) + ('board' not in self.fields)
+
+
 class Hexatron:
 
-    def __init__(self, size=11):
+    OBSERVATIONS = ('float', 'view', 'compact')
+
+    # All 64 distinct starts of 2 players, see `get_starts`
+    STARTS = get_starts(2)
+
+    def __init__(self, size=11, bitboard=False, observation='float',
+                 num_players=2):
         """Constructor.
 
         Args:
             size (int): Size of the (outer) square grid, that will contain the
                 hexagonal playing field.
+            bitboard (bool): If True, store each player's trail as an integer
+                bitmask over the cells of the playing field, instead of in a
+                3d grid. The board is then only built when an observation is
+                requested.
+            observation (str): The format of the board in observations, see
+                `board`.
+            num_players (int): The number of players, from 2 to 6. More
+                than 2 players need an odd size, for their starts to be
+                rotations of each other.
         """
 
+        if observation not in Hexatron.OBSERVATIONS:
+            raise ValueError('Unknown observation format "{}".'.format(
+                observation))
+
+        if not 2 <= num_players <= 6:
+            raise ValueError('Hexatron is played by 2 to 6 players, '
+                             'not {}.'.format(num_players))
+
+        if num_players > 2 and size % 2 == 0:
+            raise ValueError('More than 2 players need an odd size, '
+                             'not {}.'.format(size))
+
         self.size = size
         self.halfsize = size // 2
-
-    def reset(self):
+        self.bitboard = bitboard
+        self.observation = observation
+        self.num_players = num_players
+        self.rng = np.random.default_rng()
+
+        self.topology = get_topology(size)
+        self.index = self.topology.index_list
+        self.cells = self.topology.cells_list
+        self.neighbours = self.topology.neighbours_list
+        self.zobrist_trails, self.zobrist_heads, self.zobrist_orientations = \
+            get_zobrist(size, num_players)
+        self.rotations = get_rotations(num_players)
+        self.starts = get_starts(num_players)
+
+        # The start of the game, see `reset`, or None for a game restored
+        # from a snapshot
+        self.start = None
+
+    def reset(self, seed=None, start=None):
         """Initialize the playing field, and semi-randomly iniatialize
         player 1 to the bottom left of the playing field, and player 2 to the
-        bottom right of the playing field.
+        bottom right of the playing field. Further players start at
+        rotations of player 1's start around the center.
+
+        Args:
+            seed (int): If given, seed the random generator of this game
+                with it first, which makes the start reproducible.
+            start (tuple): If given, one of `starts`, instead of a random
+                start.
 
         Returns:
             observation (dict): See `_get_observation`.
         """
 
-        self.grid = np.zeros([self.size, self.size, 2])
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
+        if start is None:
+            start = self.starts[self.rng.integers(len(self.starts))]
 
         # Initialize
         #   - player 1 bottom left
         #   - player 2 top right
-        vertical_distance = np.random.randint(4)
-        horizontal_distance = np.random.randint(4)
+        vertical_distance, horizontal_distance = start[:2]
+        self.start = start
 
-        self.players = [
-            Player(
-                self.size - 1 - vertical_distance,
-                horizontal_distance,
-                np.random.choice([1, 2])),
-            Player(
-                vertical_distance,
-                self.size - 1 - horizontal_distance,
-                np.random.choice([4, 5]))]
+        # Offset of player 1 from the center of the grid
+        center = (self.size - 1) / 2
+        offset = (horizontal_distance - center,
+                  self.size - 1 - vertical_distance - center)
+
+        self.players = []
+        for rotation, orientation in zip(self.rotations, start[2:]):
+            x, y = MATRICES[rotation] @ offset + center
+            self.players.append(
+                Player(int(round(y)), int(round(x)), orientation))
 
+        self._clear()
         self._update()
         observation = self._get_observation()
         return observation
 
+    def _clear(self):
+        """Empty the playing field, keeping the players where they are."""
+
+        if self.bitboard:
+            self.trails = [0] * self.num_players
+            self.occupied = 0
+        else:
+            self.grid = np.zeros(
+                [self.size, self.size, self.num_players], dtype=bool)
+            self.occupancy = np.zeros([self.size, self.size], dtype=bool)
+
+        self.alive = [True] * self.num_players
+        self.status = [Status.VALID] * self.num_players
+        self.free = list(self.topology.free_list)
+        self.turn = 0
+        self.history = []
+        self.adjudicated = None
+
+        self.zobrist = 0
+        for idx, player in enumerate(self.players):
+            self.zobrist ^= self._zobrist_player(idx, player)
+
+    def snapshot(self):
+        """Encode the state of the game into a few dozen bytes.
+
+        The snapshot holds the size, the turn, the heads, orientations and
+        statuses of all players, and all trails as bitmasks over the cells,
+        see `get_snapshot_format`. The trajectories of the players are not
+        included.
+
+        Returns:
+            blob (bytes): The encoded state, see `restore`.
+        """
+
+        values = [self.size, self.num_players, self.turn]
+        for player, status in zip(self.players, self.status):
+            values += [player.y, player.x, player.orientation | status << 4]
+
+        blob = struct.pack(get_snapshot_format(self.num_players), *values)
+
+        nbytes = (self.topology.num_cells + 7) // 8
+        trails = [trail.to_bytes(nbytes, 'little') for trail in self._trails()]
+
+        return blob + b''.join(trails)
+
+    def _trails(self):
+        """Return the trails of all players as bitmasks over the cells.
+
+        Returns:
+            trails (list): A list of integers, one per player, with bit
+                `cell` set for every cell in the trail.
+        """
+
+        if self.bitboard:
+            return list(self.trails)
+
+        ys, xs = self.topology.cells.T
+        return [
+            int.from_bytes(np.packbits(
+                self.grid[ys, xs, idx], bitorder='little').tobytes(),
+                'little')
+            for idx in range(self.num_players)]
+
+    def expand(self):
+        """Return the outcome of all 25 pairs of actions of 2 players,
+        without changing the game.
+
+        Returns:
+            outcomes (dict): A dict, mapping every pair `(action1, action2)`
+                to a tuple `(status, state)`, where `status` is the list of
+                statuses for both players (see `act`), and `state` is the
+                snapshot of the next state (see `snapshot`), or None if the
+                game is over.
+        """
+
+        if self.num_players != 2:
+            raise ValueError('Only games of 2 players can be expanded.')
+
+        nbytes = (self.topology.num_cells + 7) // 8
+        trails = self._trails()
+
+        # The target, orientation and status of every action of each player
+        options = []
+        for idx, player in enumerate(self.players):
+            cell = self.index[player.y + 1][player.x + 1]
+            legal = self.legal_moves(idx)
+
+            player_options = []
+            for action in range(-2, 3):
+                orientation = (player.orientation + action) % 6
+                target = self.neighbours[cell][orientation]
+
+                if target < 0:
+                    status = Status.CRASHED_INTO_WALL
+                elif not legal >> (action + 2) & 1:
+                    status = Status.CRASHED_INTO_OPPONENT
+                else:
+                    status = Status.VALID
+
+                player_options.append((action, target, orientation, status))
+            options.append(player_options)
+
+        outcomes = {}
+        for action1, target1, orientation1, status1 in options[0]:
+            for action2, target2, orientation2, status2 in options[1]:
+                status = [status1, status2]
+                if status == [Status.VALID, Status.VALID] and \
+                        target1 == target2:
+                    status = [Status.CRASHED_HEAD_ON, Status.CRASHED_HEAD_ON]
+
+                state = None
+                if status == [Status.VALID, Status.VALID]:
+                    (y1, x1), (y2, x2) = \
+                        self.cells[target1], self.cells[target2]
+                    state = struct.pack(
+                        get_snapshot_format(2), self.size, 2, self.turn + 1,
+                        y1, x1, orientation1, y2, x2, orientation2)
+                    state += (trails[0] | 1 << target1).to_bytes(
+                        nbytes, 'little')
+                    state += (trails[1] | 1 << target2).to_bytes(
+                        nbytes, 'little')
+
+                outcomes[action1, action2] = status, state
+
+        return outcomes
+
+    def restore(self, blob):
+        """Restore the state of the game from a snapshot. The trajectory of
+        each player restarts at its current head, and the game has no
+        `start`.
+
+        Args:
+            blob (bytes): A snapshot, created by `snapshot`.
+
+        Returns:
+            observation (dict): See `_get_observation`.
+        """
+
+        size, num_players, turn = struct.unpack_from('<BBH', blob)
+
+        if size != self.size or num_players != self.num_players:
+            raise ValueError(
+                'Cannot restore a snapshot of size {} with {} players into a '
+                'game of size {} with {} players.'.format(
+                    size, num_players, self.size, self.num_players))
+
+        header = get_snapshot_format(num_players)
+        values = struct.unpack_from(header, blob)[3:]
+
+        self.players = [
+            Player(y, x, state & 7)
+            for y, x, state in zip(values[::3], values[1::3], values[2::3])]
+
+        self._clear()
+        self.start = None
+        self.turn = turn
+        self.status = [state >> 4 for state in values[2::3]]
+        self.alive = [status == Status.VALID for status in self.status]
+
+        nbytes = (self.topology.num_cells + 7) // 8
+        offset = struct.calcsize(header)
+
+        for idx in range(num_players):
+            trail = int.from_bytes(
+                blob[offset + idx * nbytes:offset + (idx + 1) * nbytes],
+                'little')
+
+            if self.bitboard:
+                self.trails[idx] = trail
+                self.occupied |= trail
+
+            while trail:
+                cell = (trail & -trail).bit_length() - 1
+                trail &= trail - 1
+
+                self.zobrist ^= self.zobrist_trails[idx][cell]
+                self._block(cell)
+                if not self.bitboard:
+                    y, x = self.cells[cell]
+                    self.grid[y, x, idx] = True
+                    self.occupancy[y, x] = True
+
+        observation = self._get_observation()
+        return observation
+
     def _update(self):
-        """Set the players' positions in the grid."""
+        """Set the positions of the players that are still alive in the
+        grid."""
 
         for idx, player in enumerate(self.players):
-            self.grid[player.y, player.x, idx] = 1
+            if not self.alive[idx]:
+                continue
+
+            cell = self.index[player.y + 1][player.x + 1]
+            self.zobrist ^= self.zobrist_trails[idx][cell]
+            self._block(cell)
+
+            if self.bitboard:
+                self.trails[idx] |= 1 << cell
+                self.occupied |= 1 << cell
+            else:
+                self.grid[player.y, player.x, idx] = True
+                self.occupancy[player.y, player.x] = True
+
+    def _block(self, cell):
+        """Mark a cell as occupied in the free masks of its neighbours.
+
+        Args:
+            cell (int): The cell.
+        """
+
+        for orientation, neighbour in enumerate(self.neighbours[cell]):
+            if neighbour >= 0:
+                self.free[neighbour] &= ~(1 << (orientation + 3) % 6)
+
+    def _unblock(self, cell):
+        """Mark a cell as free in the free masks of its neighbours.
+
+        Args:
+            cell (int): The cell.
+        """
+
+        for orientation, neighbour in enumerate(self.neighbours[cell]):
+            if neighbour >= 0:
+                self.free[neighbour] |= 1 << (orientation + 3) % 6
+
+    def region(self, idx):
+        """Return the free cells a player can reach.
+
+        Args:
+            idx (int): The index of the player.
+
+        Returns:
+            region (int): A bitmask, with bit `cell` set for every free cell
+                connected to the head of the player.
+        """
+
+        player = self.players[idx]
+        head = self.index[player.y + 1][player.x + 1]
+
+        if head < 0 or not self.alive[idx]:
+            return 0
+
+        region = 0
+        stack = [head]
+        while stack:
+            cell = stack.pop()
+            for orientation, neighbour in enumerate(self.neighbours[cell]):
+                if (self.free[cell] >> orientation & 1 and
+                        not region >> neighbour & 1):
+                    region |= 1 << neighbour
+                    stack.append(neighbour)
+
+        return region
+
+    def _longest_path(self, cell, visited, limit, budget):
+        """Return the largest number of steps a player on a cell can still
+        make, if it never meets the opponent.
+
+        Args:
+            cell (int): The cell of the head.
+            visited (int): A bitmask of the cells already visited by the
+                path, besides the trails.
+            limit (int): The size of the region, which bounds the number of
+                steps.
+            budget (list): A list holding the number of cells the search
+                may still visit, which is shared by all calls.
+
+        Returns:
+            length (int): The number of steps, or None if the search ran
+                out of budget.
+        """
+
+        budget[0] -= 1
+        if budget[0] < 0:
+            return None
+
+        longest = 0
+        for orientation, neighbour in enumerate(self.neighbours[cell]):
+            if self.free[cell] >> orientation & 1 and \
+                    not visited >> neighbour & 1:
+                length = self._longest_path(
+                    neighbour, visited | 1 << neighbour, limit - 1, budget)
+                if length is None:
+                    return None
+
+                longest = max(longest, 1 + length)
+                if longest == limit:
+                    break
+
+        return longest
+
+    def adjudicate(self, exact=12, max_nodes=10000):
+        """Decide the game early, if the players can no longer reach each
+        other. Each player can then at most fill its own region, so the
+        player that can make the most steps wins.
+
+        Args:
+            exact (int): Regions of at most this many cells are scored by
+                the exact number of steps the player can make in them.
+                Larger regions are scored by their size, which bounds it.
+            max_nodes (int): The largest number of cells the exact search
+                visits per region. Past it, the region is scored by its
+                size, which keeps the search within a few milliseconds.
+
+        Returns:
+            steps (list): None if any two players can still reach each
+                other. Otherwise, the number of steps every player can still
+                make, 0 for players that have crashed. The result is also
+                kept in `adjudicated`.
+        """
+
+        regions = [self.region(idx) for idx in range(self.num_players)]
+
+        union = 0
+        for region in regions:
+            if region & union:
+                return None
+            union |= region
+
+        steps = []
+        for player, region in zip(self.players, regions):
+            size = bin(region).count('1')
+            if 0 < size <= exact:
+                length = self._longest_path(
+                    self.index[player.y + 1][player.x + 1], 0, size,
+                    [max_nodes])
+                if length is not None:
+                    size = length
+            steps.append(size)
+
+        self.adjudicated = steps
+        return steps
+
+    def legal_moves(self, idx):
+        """Return the moves that keep a player on the playing field and off
+        the trails. Whether heads collide is not taken into account.
+
+        Args:
+            idx (int): The index of the player.
+
+        Returns:
+            moves (int): A 5-bit mask, where bit `move + 2` is set if `move`
+                is legal. 0 for players that have crashed.
+        """
+
+        player = self.players[idx]
+        cell = self.index[player.y + 1][player.x + 1]
+
+        if cell < 0 or not self.alive[idx]:
+            return 0
+
+        return MOVES[player.orientation][self.free[cell]]
+
+    def _zobrist_player(self, idx, player):
+        """Return the Zobrist key of a player's head and orientation.
+
+        Args:
+            idx (int): The index of the player.
+            player (Player): The player.
+
+        Returns:
+            key (int): The 64-bit key.
+        """
+
+        cell = self.index[player.y + 1][player.x + 1]
+        return (self.zobrist_heads[idx][cell] ^
+                self.zobrist_orientations[idx][player.orientation])
+
+    def key(self):
+        """Return the Zobrist key of the game, which identifies the trails,
+        heads and orientations of all players.
+
+        Returns:
+            key (int): The 64-bit key.
+        """
+
+        return self.zobrist
+
+    def board(self, observation='float', trails=None):
+        """Return the playing field as a 3d array, as seen by the agents.
+
+        Args:
+            observation (str): One of:
+                'float': a float copy, as the agents expect
+                'view': a read-only boolean view of the engine's grid
+                'compact': a boolean copy
+            trails (list): If given, the trails of a bitboard game to build
+                the board from, see `_trails`, instead of the current ones.
+
+        Returns:
+            board (np.array): A `size x size x num_players` array, containing
+                a 1 where player 1 (first layer), player 2 (second layer),
+                and so on, has been.
+        """
+
+        if self.bitboard:
+            ys, xs = self.topology.cells.T
+            nbytes = (self.topology.num_cells + 7) // 8
+
+            grid = np.zeros(
+                [self.size, self.size, self.num_players], dtype=bool)
+            if trails is None:
+                trails = self.trails
+            for idx, trail in enumerate(trails):
+                bits = np.unpackbits(
+                    np.frombuffer(trail.to_bytes(nbytes, 'little'), np.uint8),
+                    count=self.topology.num_cells, bitorder='little')
+                grid[ys, xs, idx] = bits
+        else:
+            grid = self.grid
+
+        if observation == 'float':
+            return grid.astype(float)
+
+        if observation == 'view':
+            board = grid.view()
+            board.flags.writeable = False
+            return board
+
+        return grid.copy()
 
     def _get_observation(self):
-        """Return a view of the game.
+        """Return a view of the game, as seen by player 1. See `rotate` for
+        the view of the other players.
 
         Returns:
             observation (dict): Observation dictionary, containing:
                 - board (np.array): A 3d array representation the playing
-                    field
-                - positions (tuple): A tuple of length 2, containing the
-                    coordinates for both players
-                - orientations (tuple): A tuple of length 2, containing the
-                    orientations for both players
+                    field, in the format given to the constructor, see
+                    `board`. Bitboard games only build it when it is read,
+                    see `Observation`
+                - positions (tuple): A tuple containing the coordinates for
+                    every player
+                - orientations (tuple): A tuple containing the orientations
+                    for every player
+                - moves (tuple): A tuple containing the legal moves for
+                    every player, see `legal_moves`
         """
 
+        positions = tuple([(p.x, p.y) for p in self.players])
+        orientations = tuple([p.orientation for p in self.players])
+        moves = tuple([self.legal_moves(idx)
+                       for idx in range(self.num_players)])
+
+        if self.bitboard:
+            return Observation(
+                functools.partial(
+                    self.board, self.observation, list(self.trails)),
+                positions=positions, orientations=orientations, moves=moves)
+
         observation = {
-            'board': self.grid.copy(),
-            'positions': tuple([(p.x, p.y) for p in self.players]),
-            'orientations': tuple([p.orientation for p in self.players])}
+            'board': self.board(self.observation),
+            'positions': positions,
+            'orientations': orientations,
+            'moves': moves}
 
         return observation
 
     def act(self, *actions):
-        """Move both players.
+        """Move all players that have not crashed yet.
 
         Args:
-            actions (List[int]): A list containing the action for player 1
-                and player 2. Actions are:
+            actions (List[int]): A list containing the action for every
+                player, which is ignored for players that have crashed.
+                Actions are:
                     -2: big turn left
                     -1: small turn left
                      0: go straight
@@ -151,66 +814,119 @@ class Hexatron:
 
         Returns:
             observation (dict): See `_get_observation`.
-            done (bool): True if the game is over, meaning either one or both
-                players have crashed.
-            status (List[int]): A list containing the status for player 1
-                and player 2. Status are:
+            done (bool): True if the game is over, meaning at most one player
+                has not crashed. With 2 players, the game is over as soon as
+                either one or both players have crashed.
+            status (List[int]): A list containing the status for every
+                player. Players that crashed earlier keep their status.
+                Status are:
                     0: the player has a valid position
                     1: the player crashed into a wall
                     2: the player crashed into a tail
+                    3: the player crashed into another player's head
         """
 
-        done = False
-        status = [0, 0]
+        done, status = self._step(actions)
 
-        # Valid position on the playing field
-        for player, action in zip(self.players, actions):
-            player.act(action)
+        observation = self._get_observation()
+        return observation, done, status
 
-        # Valid position on the field, not crashed into a tail
-        for idx, (player, opponent) in enumerate(
-                zip(self.players, reversed(self.players))):
-            status[idx] = self._validate_player(player, opponent)
+    def push(self, *actions):
+        """Move all players in place, like `act`, but without building an
+        observation. The move can be taken back with `pop`, which allows
+        searching the game tree without copying the game.
 
-        if sum(status) > 0:
-            done = True
+        Args:
+            actions (List[int]): See `act`.
+
+        Returns:
+            done (bool): See `act`.
+            status (List[int]): See `act`.
+        """
+
+        entry = self.zobrist, self.alive, self.status
+        done, status = self._step(actions)
+        self.history.append((done,) + entry)
+        return done, status
+
+    def pop(self):
+        """Take back the last move made with `push`."""
+
+        done, self.zobrist, alive, self.status = self.history.pop()
+        self.turn -= 1
 
         if not done:
-            self._update()
+            for idx, player in enumerate(self.players):
+                if not self.alive[idx]:
+                    continue
+
+                self._unblock(self.index[player.y + 1][player.x + 1])
+                if self.bitboard:
+                    bit = 1 << self.index[player.y + 1][player.x + 1]
+                    self.trails[idx] &= ~bit
+                    self.occupied &= ~bit
+                else:
+                    self.grid[player.y, player.x, idx] = False
+                    self.occupancy[player.y, player.x] = False
 
-        observation = self._get_observation()
-        return observation, done, status
+        for idx, player in enumerate(self.players):
+            if alive[idx]:
+                player.undo()
+
+        self.alive = alive
 
-    def _validate_player(self, player, opponent):
-        """Check if a player is in a legal state.
+    def _step(self, actions):
+        """Move all players that have not crashed yet, and update the
+        playing field if the game is not over.
+
+        The collisions of all players are resolved in a single pass: every
+        player is checked against the walls and the trails, and the valid
+        heads are counted per cell to find the head-on collisions. The cost
+        grows with the number of players, not with the number of pairs.
 
         Args:
-            player (Player): The player.
+            actions (List[int]): See `act`.
 
         Returns:
-            status (int): The status for the player:
-                0: the player has a valid position
-                1: the player crashed into a wall
-                2: the player crashed into a tail
+            done (bool): See `act`.
+            status (List[int]): See `act`.
         """
 
-        status = 0
+        # Valid position on the playing field
+        for idx, (player, action) in enumerate(zip(self.players, actions)):
+            if self.alive[idx]:
+                self.zobrist ^= self._zobrist_player(idx, player)
+                player.act(action)
+                self.zobrist ^= self._zobrist_player(idx, player)
 
-        # Position
-        status = self._validate_position(player)
+        self.turn += 1
 
-        if status > 0:
-            return status
+        # Valid position on the field, not crashed into a tail
+        status = list(self.status)
+        heads = {}
+        for idx, player in enumerate(self.players):
+            if self.alive[idx]:
+                status[idx] = (self._validate_position(player) or
+                               self._validate_crash(player))
+                if status[idx] == Status.VALID:
+                    cell = self.index[player.y + 1][player.x + 1]
+                    heads[cell] = heads.get(cell, 0) + 1
 
-        # Unoccupied space (by a TAIL)
-        status = self._validate_crash(player)
+        # Frontal crash
+        for idx, player in enumerate(self.players):
+            if (self.alive[idx] and status[idx] == Status.VALID and
+                    heads[self.index[player.y + 1][player.x + 1]] > 1):
+                status[idx] = Status.CRASHED_HEAD_ON
 
-        if status > 0:
-            return status
+        self.status = status
+        self.alive = [alive and s == Status.VALID
+                      for alive, s in zip(self.alive, status)]
+        done = sum(self.alive) < 2
 
-        # Frontal crash
-        status = player.frontal_crash(opponent)
-        return status
+        if not done:
+            self._update()
+
+        return done, status
 
     def _validate_position(self, player):
         """Check if a player resides inside the hexagonal playing field.
@@ -224,6 +940,11 @@ class Hexatron:
                 1: the player crashed into a wall
         """
 
+        if self.bitboard:
+            if self.index[player.y + 1][player.x + 1] < 0:
+                return Status.CRASHED_INTO_WALL
+            return Status.VALID
+
         if (player.x < 0 or player.x >= self.size or
                 player.y < 0 or player.y >= self.size or
                 player.x + player.y < self.halfsize or
@@ -244,25 +965,211 @@ class Hexatron:
                 2: the player crashed into a tail
         """
 
-        if np.sum(self.grid, axis=2)[player.y, player.x] > 0:
+        if self.bitboard:
+            if self.occupied >> self.index[player.y + 1][player.x + 1] & 1:
+                return Status.CRASHED_INTO_OPPONENT
+            return Status.VALID
+
+        if self.occupancy[player.y, player.x]:
             return Status.CRASHED_INTO_OPPONENT
 
         return Status.VALID
 
-    def _validate_frontal_crash(self, player1, player2):
-        """Check if two players' heads collide.
+
+class BatchHexatron:
+
+    def __init__(self, num_games, size=11, num_players=2):
+        """Constructor.
 
         Args:
-            player1 (Player): Player 1.
-            player2 (Player): Player 2.
+            num_games (int): Number of games that are played simultaneously.
+            size (int): Size of the (outer) square grid, that will contain the
+                hexagonal playing field.
+            num_players (int): The number of players, see `Hexatron`.
+        """
+
+        self.num_games = num_games
+        self.size = size
+        self.halfsize = size // 2
+        self.num_players = num_players
+
+        # The starts of the cells, computed once by a scalar game
+        game = Hexatron(size, num_players=num_players)
+        self.start_cells = np.zeros(
+            [len(game.starts), num_players], dtype=int)
+        for idx, start in enumerate(game.starts):
+            game.reset(start=start)
+            self.start_cells[idx] = [
+                game.index[p.y + 1][p.x + 1] for p in game.players]
+
+        self.topology = get_topology(size)
+        self.index = self.topology.index
+        self.neighbours = self.topology.neighbours
+        self.num_cells = self.topology.num_cells
+        self.moves = np.array(MOVES)
+        self.starts = np.array(game.starts)
+        self.rng = np.random.default_rng()
+
+    def reset(self, seed=None):
+        """Initialize all games, see `Hexatron.reset`.
+
+        Args:
+            seed (int): If given, seed the random generator of the games with
+                it first, which makes all starts reproducible.
 
         Returns:
-            status (int): The status for the player:
-                0: the player has a valid position
-                2: the player crashed into his opponent's head
+            observation (dict): See `_get_observation`.
         """
 
-        if player1.frontal_crash(player2):
-            Status.CRASHED_INTO_OPPONENT
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
 
-        return Status.VALID
+        shape = [self.num_games, self.num_players]
+        self.occupancy = np.zeros(
+            [self.num_games, self.num_cells, self.num_players], dtype=bool)
+        self.heads = np.zeros(shape, dtype=int)
+        self.orientations = np.zeros(shape, dtype=int)
+        self.alive = np.zeros(shape, dtype=bool)
+        self.status = np.zeros(shape, dtype=int)
+        self.free = np.zeros([self.num_games, self.num_cells], dtype=int)
+
+        self._reset(np.arange(self.num_games))
+        observation = self._get_observation()
+        return observation
+
+    def _reset(self, games):
+        """Semi-randomly initialize the given games, the same way
+        `Hexatron.reset` does.
+
+        Args:
+            games (np.array): Indices of the games to initialize.
+        """
+
+        starts = self.rng.integers(len(self.starts), size=len(games))
+
+        self.heads[games] = self.start_cells[starts]
+        self.orientations[games] = self.starts[starts, 2:]
+        self.alive[games] = True
+        self.status[games] = Status.VALID
+
+        self.occupancy[games] = False
+        self.occupancy[games[:, None], self.heads[games],
+                       np.arange(self.num_players)] = True
+
+        self.free[games] = self.topology.free
+        self._block(np.repeat(games, self.num_players),
+                    self.heads[games].ravel())
+
+    def _block(self, games, cells):
+        """Mark cells as occupied in the free masks of their neighbours, see
+        `Hexatron._block`.
+
+        Args:
+            games (np.array): Indices of the games.
+            cells (np.array): The cell to block in each game. A game may
+                appear more than once, for different cells.
+        """
+
+        for orientation in range(6):
+            neighbours = self.neighbours[cells, orientation]
+            valid = neighbours >= 0
+            self.free[games[valid], neighbours[valid]] &= \
+                ~(1 << (orientation + 3) % 6)
+
+    def _get_observation(self):
+        """Return a view of all games.
+
+        Returns:
+            observation (dict): Observation dictionary, containing:
+                - occupancy (np.array): A `num_games x cells x num_players`
+                    boolean array, containing the trails of all players
+                - positions (np.array): A `num_games x num_players` array,
+                    containing the cell of every player
+                - orientations (np.array): A `num_games x num_players`
+                    array, containing the orientations for every player
+                - moves (np.array): A `num_games x num_players` array,
+                    containing the legal moves for every player, see
+                    `Hexatron.legal_moves`
+                - alive (np.array): A `num_games x num_players` boolean
+                    array, True for every player that has not crashed
+        """
+
+        free = self.free[np.arange(self.num_games)[:, None], self.heads]
+
+        observation = {
+            'occupancy': self.occupancy.copy(),
+            'positions': self.heads.copy(),
+            'orientations': self.orientations.copy(),
+            'moves': np.where(
+                self.alive, self.moves[self.orientations, free], 0),
+            'alive': self.alive.copy()}
+
+        return observation
+
+    def act(self, actions):
+        """Move all players that have not crashed yet in all games. Games
+        that are over are initialized again.
+
+        Head-on collisions are found without comparing every pair of
+        players: the targets of each game are sorted, so equal targets end
+        up next to each other.
+
+        Args:
+            actions (np.array): A `num_games x num_players` array,
+                containing the action for every player in every game. See
+                `Hexatron.act`.
+
+        Returns:
+            observation (dict): See `_get_observation`. Games that are over
+                have already been initialized again.
+            done (np.array): True for every game that is over.
+            status (np.array): A `num_games x num_players` array, containing
+                the status for every player in every game. See `Status`.
+        """
+
+        alive = self.alive
+        games = np.arange(self.num_games)[:, None]
+
+        orientations = (self.orientations + np.asarray(actions)) % 6
+        self.orientations = np.where(alive, orientations, self.orientations)
+        heads = np.where(
+            alive, self.neighbours[self.heads, self.orientations], -1)
+
+        wall = (heads < 0) & alive
+        tail = self.occupancy[games, heads].any(axis=2) & alive & ~wall
+
+        # Give every player that has not got a valid target a unique
+        # negative target, which cannot collide
+        valid = alive & ~wall & ~tail
+        targets = np.where(
+            valid, heads, -1 - np.arange(self.num_players))
+        order = np.argsort(targets, axis=1)
+        ordered = np.take_along_axis(targets, order, axis=1)
+        equal = ordered[:, 1:] == ordered[:, :-1]
+        collided = np.zeros_like(valid)
+        collided[:, 1:] |= equal
+        collided[:, :-1] |= equal
+        frontal = np.zeros_like(valid)
+        np.put_along_axis(frontal, order, collided & (ordered >= 0), axis=1)
+
+        status = np.select(
+            [wall, tail, frontal],
+            [Status.CRASHED_INTO_WALL, Status.CRASHED_INTO_OPPONENT,
+             Status.CRASHED_HEAD_ON],
+            self.status)
+        self.status = status.copy()
+        self.alive = status == Status.VALID
+        done = self.alive.sum(axis=1) < 2
+
+        self.heads = np.where(alive, heads, self.heads)
+        moved = self.alive & ~done[:, None]
+        running, players = np.nonzero(moved)
+        self.occupancy[running, heads[running, players], players] = True
+        self._block(running, heads[running, players])
+
+        finished = np.flatnonzero(done)
+        if len(finished) > 0:
+            self._reset(finished)
+
+        observation = self._get_observation()
+        return observation, done, status
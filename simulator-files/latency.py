@@ -0,0 +1,181 @@
+import numpy as np
+
+from workers import is_timeout
+
+# The upper edges of the bins of the histograms: 20 per decade, from 10 us to
+# 10 s. A last bin holds everything above.
+EDGES = np.logspace(-5, 1, 121)
+
+
+class LatencyHistogram:
+
+    def __init__(self):
+        """Constructor. Creates an empty histogram of the latencies of an
+        agent's moves, per turn. Percentiles are estimated by the upper edge
+        of their bin, which is at most 12% too high, and never more than the
+        exact maximum."""
+
+        # counts[turn, bin]: the number of moves of a turn in a bin
+        self.counts = np.zeros([0, len(EDGES) + 1], dtype=np.int64)
+        # maxima[turn]: the largest latency of a turn
+        self.maxima = np.zeros(0)
+        # The number of moves that exceeded the deadline
+        self.timeouts = 0
+
+    def add(self, latencies, timeouts=0):
+        """Add the latencies of the moves of a game.
+
+        Args:
+            latencies (list): The latency in seconds of every move, in the
+                order of the turns, including a last move that forfeited.
+            timeouts (int): The number of these moves that exceeded the
+                deadline.
+        """
+
+        self.timeouts += timeouts
+
+        latencies = np.asarray(latencies, dtype=float)
+        turns = np.arange(len(latencies))
+
+        if len(latencies) > len(self.maxima):
+            extra = len(latencies) - len(self.maxima)
+            self.counts = np.pad(self.counts, [(0, extra), (0, 0)])
+            self.maxima = np.pad(self.maxima, [(0, extra)])
+
+        np.add.at(self.counts, (turns, np.searchsorted(EDGES, latencies)), 1)
+        np.maximum.at(self.maxima, turns, latencies)
+
+    def summary(self, turns=slice(None)):
+        """Return the distribution of the latencies of some turns.
+
+        Args:
+            turns (slice): The turns, counting from 0. All turns by default.
+
+        Returns:
+            summary (dict): The number of moves, and the median, 99th
+                percentile and maximum latency in seconds, or None if there
+                were no moves.
+        """
+
+        counts = self.counts[turns].sum(axis=0)
+        moves = int(counts.sum())
+        if moves == 0:
+            return {'moves': 0, 'p50': None, 'p99': None, 'max': None}
+
+        maximum = float(self.maxima[turns].max())
+        cumulative = np.cumsum(counts)
+        edges = np.append(EDGES, np.inf)
+
+        def percentile(q):
+            idx = np.searchsorted(cumulative, q / 100 * moves)
+            return min(float(edges[idx]), maximum)
+
+        return {
+            'moves': moves,
+            'p50': percentile(50),
+            'p99': percentile(99),
+            'max': maximum}
+
+
+class LatencyReport:
+
+    def __init__(self, deadline=1.0):
+        """Constructor. Creates an empty report of the latencies of all
+        agents in a run. The latencies are measured the way the deadline is
+        enforced, including the time spent in the pipe, see
+        `AgentWorker.move`, and a move that timed out counts with the time
+        it was given.
+
+        Args:
+            deadline (float): The budget in seconds of every move, which the
+                latencies are compared to.
+        """
+
+        self.deadline = deadline
+        self.histograms = {}
+
+    def add(self, agent, latencies, timeouts=0):
+        """Add the latencies of an agent's moves in a game.
+
+        Args:
+            agent (str): The agent.
+            latencies (list): See `LatencyHistogram.add`.
+            timeouts (int): See `LatencyHistogram.add`.
+        """
+
+        if agent not in self.histograms:
+            self.histograms[agent] = LatencyHistogram()
+
+        self.histograms[agent].add(latencies, timeouts)
+
+    def add_result(self, result):
+        """Add the latencies of both players of a game.
+
+        Args:
+            result (dict): See `tournament.play_game`.
+        """
+
+        for agent, latencies, error in zip(
+                result['agents'], result['latencies'], result['errors']):
+            self.add(agent, latencies, int(is_timeout(error)))
+
+    def utilisation(self, agent):
+        """Return how much of the budget an agent used.
+
+        Args:
+            agent (str): The agent.
+
+        Returns:
+            utilisation (dict): The 99th percentile and the maximum latency
+                over all turns, as a fraction of the deadline, and the
+                number of moves that exceeded it.
+        """
+
+        summary = self.histograms[agent].summary()
+        return {
+            'p99': summary['p99'] / self.deadline,
+            'max': summary['max'] / self.deadline,
+            'timeouts': self.histograms[agent].timeouts}
+
+    def format(self, bucket=10):
+        """Return the report as text: the latencies of every agent, per
+        bucket of turns.
+
+        Args:
+            bucket (int): The number of turns per line.
+
+        Returns:
+            text (str): The report.
+        """
+
+        lines = []
+        for agent in sorted(self.histograms):
+            histogram = self.histograms[agent]
+            summary = histogram.summary()
+            if summary['moves'] == 0:
+                continue
+
+            utilisation = self.utilisation(agent)
+            lines += [
+                '%s: %d moves, %d timeouts, the p99 uses %.0f%% and the max '
+                '%.0f%% of the %.3f s budget' % (
+                    agent, summary['moves'], utilisation['timeouts'],
+                    100 * utilisation['p99'], 100 * utilisation['max'],
+                    self.deadline),
+                '  %9s %7s %9s %9s %9s' % (
+                    'turns', 'moves', 'p50 ms', 'p99 ms', 'max ms')]
+
+            rows = [(slice(turn, turn + bucket), '%d-%d' % (
+                turn + 1, turn + bucket))
+                for turn in range(0, len(histogram.maxima), bucket)]
+            rows.append((slice(None), 'all'))
+
+            for turns, label in rows:
+                summary = histogram.summary(turns)
+                if summary['moves'] > 0:
+                    lines.append('  %9s %7d %9.2f %9.2f %9.2f' % (
+                        label, summary['moves'], 1e3 * summary['p50'],
+                        1e3 * summary['p99'], 1e3 * summary['max']))
+            lines.append('')
+
+        return '\n'.join(lines)
@@ -0,0 +1,330 @@
+import argparse
+import concurrent.futures
+import math
+import os
+import random
+import sys
+
+import numpy as np
+
+from game import Hexatron
+from store import ResultStore
+from tournament import play_game
+
+
+def elo_to_score(elo):
+    """Return the expected score of a player that is `elo` points stronger.
+
+    Args:
+        elo (float): The Elo difference.
+
+    Returns:
+        score (float): The expected score, in [0,1].
+    """
+
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    """Return the Elo difference that gives an expected score.
+
+    Args:
+        score (float): The score, in ]0,1[.
+
+    Returns:
+        elo (float): The Elo difference.
+    """
+
+    return -400 * math.log10(1 / score - 1)
+
+
+class SPRT:
+
+    # The scores of a pair of games, see `add`
+    SCORES = np.array([0, 0.25, 0.5, 0.75, 1])
+
+    def __init__(self, elo0=0, elo1=10, alpha=0.05, beta=0.05):
+        """Constructor. Creates a sequential probability ratio test of the
+        hypothesis that the Elo difference between two agents is `elo1`,
+        against the hypothesis that it is `elo0`.
+
+        The games are played in pairs, with the sides swapped, which cancels
+        most of the advantage of a start. Every pair scores one of 5 values,
+        and the log-likelihood ratio is that of a normal approximation of
+        their distribution.
+
+        Args:
+            elo0 (float): The Elo difference of the null hypothesis.
+            elo1 (float): The Elo difference of the alternative hypothesis.
+            alpha (float): The probability of accepting H1 when H0 is true.
+            beta (float): The probability of accepting H0 when H1 is true.
+        """
+
+        if not elo0 < elo1:
+            raise ValueError('elo0 ({}) must be smaller than elo1 '
+                             '({}).'.format(elo0, elo1))
+
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+        # counts[i]: the number of pairs that scored `SCORES[i]`
+        self.counts = np.zeros(len(SPRT.SCORES), dtype=int)
+
+    def add(self, scores):
+        """Add the result of a pair of games.
+
+        Args:
+            scores (list): The scores of the first agent in both games,
+                each 0, 0.5 or 1.
+        """
+
+        self.counts[int(round(2 * sum(scores)))] += 1
+
+    def pairs(self):
+        """Return the number of pairs of games played."""
+
+        return int(self.counts.sum())
+
+    def _moments(self):
+        """Return the mean and variance of the score of a pair, with half a
+        pair added to every score, which keeps the variance positive while
+        few pairs have been played."""
+
+        counts = self.counts + 0.5
+        frequencies = counts / counts.sum()
+        mean = frequencies @ SPRT.SCORES
+        variance = frequencies @ (SPRT.SCORES - mean) ** 2
+        return mean, variance
+
+    def llr(self):
+        """Return the log-likelihood ratio of H1 against H0.
+
+        Returns:
+            llr (float): The ratio.
+        """
+
+        if self.pairs() == 0:
+            return 0.0
+
+        score0, score1 = elo_to_score(self.elo0), elo_to_score(self.elo1)
+        mean, variance = self._moments()
+
+        return (self.pairs() * (score1 - score0) *
+                (2 * mean - score0 - score1) / (2 * variance))
+
+    def result(self):
+        """Return the outcome of the test.
+
+        Returns:
+            result (str): 'H1' if the Elo difference is accepted to be at
+                least `elo1`, 'H0' if it is accepted to be at most `elo0`,
+                or None if more games are needed.
+        """
+
+        llr = self.llr()
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def elo(self):
+        """Return the estimated Elo difference, with a 95% confidence
+        interval.
+
+        Returns:
+            elo (float): The estimate.
+            interval (tuple): The lower and upper bound.
+        """
+
+        mean, variance = self._moments()
+        margin = 1.96 * math.sqrt(variance / (self.pairs() + 2.5))
+
+        def elo(score):
+            return score_to_elo(min(max(score, 1e-6), 1 - 1e-6))
+
+        return elo(mean), (elo(mean - margin), elo(mean + margin))
+
+    def format(self):
+        """Return the state of the test as a line of text."""
+
+        elo, (low, high) = self.elo()
+        return ('%d pairs, Elo %+.1f [%+.1f, %+.1f], LLR %.2f [%.2f, %.2f]'
+                % (self.pairs(), elo, low, high, self.llr(), self.lower,
+                   self.upper))
+
+
+def play_pair(agents, start, size=13, adjudicate=False, deadline=1.0,
+              seed=0):
+    """Play a start twice, once with each agent as player 1.
+
+    Args:
+        agents (tuple): The module names of both agents.
+        start (tuple): One of `Hexatron.STARTS`.
+        size (int): Size of the (outer) square grid.
+        adjudicate (bool): See `tournament.play_game`.
+        deadline (float): See `tournament.play_game`.
+        seed (int): See `tournament.play_game`.
+
+    Returns:
+        results (list): The results of both games, see
+            `tournament.play_game`.
+    """
+
+    return [play_game(agents, start, size, adjudicate, deadline, seed),
+            play_game(agents[::-1], start, size, adjudicate, deadline, seed)]
+
+
+def run_match(agents, sprt, starts, max_pairs, sequential=True, size=13,
+              adjudicate=False, deadline=1.0, seed=0, workers=None,
+              callback=None):
+    """Play pairs of games between two agents over a pool of processes,
+    until the test is decided, or `max_pairs` pairs have been played.
+
+    Args:
+        agents (tuple): The module names of both agents.
+        sprt (SPRT): The test, which the results are added to.
+        starts (list): The starts to play, in order. They are played again
+            from the first one if needed.
+        max_pairs (int): The largest number of pairs to play.
+        sequential (bool): If False, play all `max_pairs` pairs, even once
+            the test is decided.
+        size (int): Size of the (outer) square grid.
+        adjudicate (bool): See `tournament.play_game`.
+        deadline (float): See `tournament.play_game`.
+        seed (int): The seed of the agents in the first pair. Every next
+            pair adds 1, so pairs that play the same start differ.
+        workers (int): The number of processes. Defaults to the number of
+            processors.
+        callback (function): If given, called with the results of every
+            pair, see `play_pair`, as soon as they are added to the test.
+
+    Returns:
+        result (str): See `SPRT.result`.
+    """
+
+    # Only a few pairs are scheduled ahead, so that few games are played in
+    # vain once the test is decided
+    ahead = 2 * (workers or os.cpu_count())
+    scheduled = 0
+    pending = set()
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        while pending or scheduled < max_pairs:
+            if sequential and sprt.result() is not None:
+                break
+
+            while len(pending) < ahead and scheduled < max_pairs:
+                start = starts[scheduled % len(starts)]
+                pending.add(executor.submit(
+                    play_pair, agents, start, size, adjudicate, deadline,
+                    seed + scheduled))
+                scheduled += 1
+
+            finished, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in finished:
+                results = future.result()
+                sprt.add([results[0]['scores'][0], results[1]['scores'][1]])
+                if callback is not None:
+                    callback(results)
+
+        for future in pending:
+            future.cancel()
+
+    return sprt.result()
+
+
+def main(argv):
+    """Script starting point.
+
+    Args:
+        argv (list): List of command-line arguments.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='python[3] simulator.py match',
+        description='Play pairs of games between two agents, with the sides '
+                    'swapped, and test whether the first agent is stronger.')
+    parser.add_argument('agent_one')
+    parser.add_argument('agent_two')
+    parser.add_argument(
+        '--sprt', action='store_true',
+        help='stop as soon as the test is decided, instead of playing '
+             '--pairs pairs')
+    parser.add_argument('--elo0', type=float, default=0,
+                        help='the Elo difference of the null hypothesis')
+    parser.add_argument('--elo1', type=float, default=10,
+                        help='the Elo difference of the alternative')
+    parser.add_argument('--alpha', type=float, default=0.05,
+                        help='the rate of false positives')
+    parser.add_argument('--beta', type=float, default=0.05,
+                        help='the rate of false negatives')
+    parser.add_argument(
+        '--pairs', type=int,
+        help='the number of pairs to play, or at most with --sprt. By '
+             'default every start once, or up to 10000 pairs with --sprt, '
+             'which plays the starts again')
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='the seed of the order of the starts and of the agents')
+    parser.add_argument(
+        '--size', type=int, default=13,
+        help='size of the square grid that contains the playing field')
+    parser.add_argument(
+        '--adjudicate', action='store_true',
+        help='stop games once the agents can no longer reach each other')
+    parser.add_argument(
+        '--deadline', type=float, default=1.0,
+        help='seconds an agent has for every move, before it forfeits')
+    parser.add_argument(
+        '--store', nargs='?', const='results/games.sqlite3',
+        help='record all games and moves in this database, by default '
+             '%(const)s')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes, by default one per CPU')
+    args = parser.parse_args(argv[1:])
+
+    agents = tuple(os.path.splitext(agent)[0]
+                   for agent in [args.agent_one, args.agent_two])
+
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+    max_pairs = args.pairs
+    if max_pairs is None:
+        max_pairs = 10000 if args.sprt else len(Hexatron.STARTS)
+
+    starts = list(Hexatron.STARTS)
+    random.Random(args.seed).shuffle(starts)
+
+    store = None if args.store is None else ResultStore(args.store)
+
+    def report(results):
+        if store is not None:
+            for result in results:
+                store.add(result)
+        print('\r' + sprt.format(), end='', file=sys.stderr)
+
+    result = run_match(agents, sprt, starts, max_pairs, args.sprt, args.size,
+                       args.adjudicate, args.deadline, args.seed, args.workers,
+                       report)
+    print(file=sys.stderr)
+
+    if store is not None:
+        store.close()
+
+    print(sprt.format())
+    if result == 'H1':
+        print('H1 accepted: "%s" is at least %+g Elo stronger than "%s".' %
+              (agents[0], args.elo1, agents[1]))
+    elif result == 'H0':
+        print('H0 accepted: "%s" is at most %+g Elo stronger than "%s".' %
+              (agents[0], args.elo0, agents[1]))
+    else:
+        print('Undecided after %d pairs.' % sprt.pairs())
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,221 @@
+import numpy as np
+
+
+def fit(scores, games, prior=1.0, ratings=None, tolerance=1e-6,
+        max_iterations=10000):
+    """Fit a Bradley-Terry model to the results of games, by minorization-
+    maximization. Draws count as half a win for both agents.
+
+    Several sets of results can be fitted at once, along leading axes, which
+    is how the bootstrap fits all its samples together.
+
+    Args:
+        scores (np.array): A `... x agents x agents` array, containing the
+            points agent i scored against agent j.
+        games (np.array): A `... x agents x agents` array, containing the
+            number of games between agent i and agent j.
+        prior (float): The number of virtual draws added to every pair of
+            agents that played, which keeps the ratings of agents that won
+            or lost all their games finite.
+        ratings (np.array): If given, the Elo ratings to start from, such as
+            those of an earlier fit, which needs fewer iterations.
+        tolerance (float): Stop once no rating changes by more than this
+            many Elo points.
+        max_iterations (int): Stop after this many iterations.
+
+    Returns:
+        ratings (np.array): A `... x agents` array, containing the Elo
+            rating of every agent. The agents with games have a mean rating
+            of 0, and the others keep their rating.
+    """
+
+    played = games > 0
+    scores = scores + prior / 2 * played
+    games = games + prior * played
+    wins = scores.sum(axis=-1)
+
+    if ratings is None:
+        ratings = np.zeros(wins.shape)
+    strengths = 10 ** (np.asarray(ratings, dtype=float) / 400)
+
+    # Agents without games keep their rating
+    active = wins > 0
+
+    for _ in range(max_iterations):
+        pairs = strengths[..., :, None] + strengths[..., None, :]
+        expected = (games / pairs).sum(axis=-1)
+        updated = np.where(
+            active, wins / np.where(active, expected, 1), strengths)
+
+        # Fix the mean rating of the agents with games at 0
+        mean = (np.log(updated) * active).sum(axis=-1, keepdims=True) / \
+            np.maximum(active.sum(axis=-1, keepdims=True), 1)
+        updated = np.where(active, updated / np.exp(mean), strengths)
+
+        change = np.abs(np.log10(updated / strengths)).max()
+        strengths = updated
+        if 400 * change < tolerance:
+            break
+
+    return 400 * np.log10(strengths)
+
+
+class Ratings:
+
+    def __init__(self, agents, prior=1.0):
+        """Constructor. Creates the ratings of agents, without any games.
+
+        Results can be added at any time. The next fit starts from the
+        ratings of the previous one, so updating the ratings after a few
+        more games is cheap.
+
+        Args:
+            agents (list): The names of the agents.
+            prior (float): See `fit`.
+        """
+
+        self.agents = list(agents)
+        self.index = {agent: idx for idx, agent in enumerate(self.agents)}
+        self.prior = prior
+
+        # wins[i, j]: the number of games agent i won against agent j, and
+        # likewise for draws and losses
+        shape = [len(self.agents), len(self.agents)]
+        self.wins = np.zeros(shape, dtype=int)
+        self.draws = np.zeros(shape, dtype=int)
+        self.losses = np.zeros(shape, dtype=int)
+
+        self.ratings = np.zeros(len(self.agents))
+        self.fitted = True
+
+    def add(self, agent, opponent, score):
+        """Add the result of a game.
+
+        Args:
+            agent (str): The name of one agent.
+            opponent (str): The name of the other agent.
+            score (float): The score of the first agent, 1 for a win, 0.5
+                for a draw and 0 for a loss.
+        """
+
+        i, j = self.index[agent], self.index[opponent]
+        if score == 1:
+            self.wins[i, j] += 1
+            self.losses[j, i] += 1
+        elif score == 0:
+            self.losses[i, j] += 1
+            self.wins[j, i] += 1
+        else:
+            self.draws[i, j] += 1
+            self.draws[j, i] += 1
+
+        self.fitted = False
+
+    def add_result(self, result):
+        """Add the result of a game.
+
+        Args:
+            result (dict): See `tournament.play_game`.
+        """
+
+        self.add(*result['agents'], result['scores'][0])
+
+    def add_counts(self, wins, draws, losses):
+        """Add the results of many games at once, such as those of a
+        `tournament.CrossTable`.
+
+        Args:
+            wins (np.array): A square array, containing the number of games
+                agent i won against agent j.
+            draws (np.array): Likewise, for draws.
+            losses (np.array): Likewise, for losses.
+        """
+
+        self.wins += wins
+        self.draws += draws
+        self.losses += losses
+        self.fitted = False
+
+    def fit(self):
+        """Return the ratings, fitting them again if games were added.
+
+        Returns:
+            ratings (np.array): The Elo rating of every agent, see `fit`.
+        """
+
+        if not self.fitted:
+            self.ratings = fit(
+                self.wins + 0.5 * self.draws,
+                self.wins + self.draws + self.losses,
+                self.prior, self.ratings)
+            self.fitted = True
+
+        return self.ratings
+
+    def intervals(self, samples=1000, level=0.95, seed=0):
+        """Return bootstrap confidence intervals of the ratings. Every sample
+        draws the wins, draws and losses of every pair of agents again, from
+        the frequencies of the games they played.
+
+        Args:
+            samples (int): The number of samples.
+            level (float): The confidence level.
+            seed (int): The seed of the samples.
+
+        Returns:
+            intervals (np.array): An `agents x 2` array, containing the lower
+                and upper bound of the rating of every agent.
+        """
+
+        ratings = self.fit()
+        rng = np.random.default_rng(seed)
+
+        # Sample the pairs i < j, and mirror them for j > i
+        rows, columns = np.triu_indices(len(self.agents), 1)
+        counts = np.stack([self.wins[rows, columns],
+                           self.draws[rows, columns],
+                           self.losses[rows, columns]], axis=-1)
+        games = counts.sum(axis=-1)
+        frequencies = counts / np.maximum(games, 1)[:, None]
+        sampled = rng.multinomial(
+            games, frequencies, size=[samples, len(games)])
+
+        shape = [samples, len(self.agents), len(self.agents)]
+        scores = np.zeros(shape)
+        scores[:, rows, columns] = sampled[..., 0] + 0.5 * sampled[..., 1]
+        scores[:, columns, rows] = sampled[..., 2] + 0.5 * sampled[..., 1]
+        played = np.zeros(shape)
+        played[:, rows, columns] = games
+        played[:, columns, rows] = games
+
+        fitted = fit(scores, played, self.prior,
+                     np.broadcast_to(ratings, shape[:2]))
+        tail = (1 - level) / 2 * 100
+        return np.percentile(fitted, [tail, 100 - tail], axis=0).T
+
+    def format(self, samples=1000, level=0.95):
+        """Return the ratings as text, best first, with their confidence
+        intervals.
+
+        Args:
+            samples (int): See `intervals`.
+            level (float): See `intervals`.
+
+        Returns:
+            text (str): The table.
+        """
+
+        ratings = self.fit()
+        intervals = self.intervals(samples, level)
+        games = (self.wins + self.draws + self.losses).sum(axis=1)
+        width = max(len(agent) for agent in self.agents)
+
+        lines = ['%3s %-*s  %6s  %15s  %6s' % (
+            '', width, 'agent', 'Elo', '%g%% interval' % (100 * level),
+            'games')]
+        for rank, i in enumerate(np.argsort(-ratings, kind='stable')):
+            lines.append('%3d %-*s  %+6.0f  [%+6.0f, %+6.0f]  %6d' % (
+                rank + 1, width, self.agents[i], ratings[i],
+                intervals[i, 0], intervals[i, 1], games[i]))
+
+        return '\n'.join(lines)
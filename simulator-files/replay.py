@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from game import Hexatron
+
+# The version of the records, see `encode`
+VERSION = 1
+
+# The header of a record: the version, the size, the number of players and
+# the number of turns
+HEADER = '<BBBH'
+
+# The header of a file of records: the number of records in it
+FILE_HEADER = '<I'
+
+TEMPLATE = os.path.join(os.path.dirname(__file__), 'html.template')
+
+
+def encode(size, start, agents, moves):
+    """Encode a game into a compact record.
+
+    A record holds the header, the start, the names of the agents, and the
+    moves of all players, 3 bits per move. A game of 60 turns takes less
+    than 70 bytes.
+
+    Args:
+        size (int): Size of the (outer) square grid.
+        start (tuple): The start, see `Hexatron.reset`. A game restored
+            from a snapshot has none, and cannot be recorded.
+        agents (list): The names of the agents.
+        moves (list): For every player, the list of its moves, one per turn.
+
+    Returns:
+        record (bytes): The record, see `decode`.
+    """
+
+    if start is None:
+        raise ValueError('A game restored from a snapshot has no start.')
+
+    turns = len(moves[0]) if moves else 0
+    record = struct.pack(HEADER, VERSION, size, len(agents), turns)
+    record += bytes(start)
+
+    for agent in agents:
+        name = agent.encode('utf8')
+        record += struct.pack('<B', len(name)) + name
+
+    # Turn by turn, with the players in order
+    values = np.array(moves, dtype=int).T.reshape(-1, 1) + 2
+    values = values.astype(np.uint8)
+    bits = np.unpackbits(values, axis=1, bitorder='little')[:, :3]
+    record += np.packbits(bits.ravel(), bitorder='little').tobytes()
+
+    return record
+
+
+def decode(record):
+    """Decode a record.
+
+    Args:
+        record (bytes): The record, see `encode`.
+
+    Returns:
+        game (dict): The size, start, agents and moves, see `encode`.
+    """
+
+    version, size, num_players, turns = struct.unpack_from(HEADER, record)
+    if version != VERSION:
+        raise ValueError('Unknown replay version {}.'.format(version))
+
+    offset = struct.calcsize(HEADER)
+    start = tuple(record[offset:offset + 2 + num_players])
+    offset += 2 + num_players
+
+    agents = []
+    for _ in range(num_players):
+        length = record[offset]
+        agents.append(record[offset + 1:offset + 1 + length].decode('utf8'))
+        offset += 1 + length
+
+    count = turns * num_players
+    bits = np.unpackbits(np.frombuffer(record, np.uint8, offset=offset),
+                         count=3 * count, bitorder='little')
+    values = np.packbits(bits.reshape(count, 3), axis=1, bitorder='little')
+    moves = values.reshape(turns, num_players).T.astype(int) - 2
+
+    return {
+        'size': size,
+        'start': start,
+        'agents': agents,
+        'moves': moves.tolist()}
+
+
+class ReplayFile:
+
+    def __init__(self, path='replays/replays.hxr'):
+        """Constructor. Opens a file of records for appending, creating it if
+        needed. The file starts with the number of records, see
+        `FILE_HEADER`, so that opening it does not read the records. Every
+        record is preceded by its length.
+
+        Args:
+            path (str): The file.
+        """
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        if os.path.exists(path):
+            self.file = open(path, 'r+b')
+            self.count, = struct.unpack(
+                FILE_HEADER, self.file.read(struct.calcsize(FILE_HEADER)))
+        else:
+            self.file = open(path, 'w+b')
+            self.count = 0
+            self.file.write(struct.pack(FILE_HEADER, self.count))
+
+    def append(self, record):
+        """Append a record.
+
+        Args:
+            record (bytes): The record, see `encode`.
+
+        Returns:
+            number (int): The number of the record in the file, counting from
+                0.
+        """
+
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(struct.pack('<H', len(record)) + record)
+        self.count += 1
+
+        self.file.seek(0)
+        self.file.write(struct.pack(FILE_HEADER, self.count))
+        return self.count - 1
+
+    def close(self):
+        """Close the file."""
+
+        self.file.close()
+
+
+def read(path):
+    """Read all records of a file.
+
+    Args:
+        path (str): The file.
+
+    Returns:
+        records (list): The records, see `decode`.
+    """
+
+    with open(path, 'rb') as infile:
+        data = infile.read()
+
+    records = []
+    offset = struct.calcsize(FILE_HEADER)
+    while offset < len(data):
+        length, = struct.unpack_from('<H', data, offset)
+        records.append(data[offset + 2:offset + 2 + length])
+        offset += 2 + length
+
+    return records
+
+
+def replay(record):
+    """Play a record again.
+
+    Args:
+        record (bytes): The record.
+
+    Returns:
+        game (Hexatron): The game, after the last move.
+        agents (list): The names of the agents.
+    """
+
+    decoded = decode(record)
+
+    game = Hexatron(decoded['size'], num_players=len(decoded['agents']))
+    game.reset(start=decoded['start'])
+    for actions in zip(*decoded['moves']):
+        game.act(*actions)
+
+    return game, decoded['agents']
+
+
+def render(game, agents):
+    """Render a game as an HTML page.
+
+    Args:
+        game (Hexatron): The game.
+        agents (list): The names of both agents.
+
+    Returns:
+        html (str): The page.
+    """
+
+    with open(TEMPLATE, 'r', encoding='utf8') as infile:
+        template = infile.read()
+
+    output = template.replace('{{AGENT_1}}', agents[0])
+    output = output.replace('{{AGENT_2}}', agents[1])
+    output = output.replace('{{SIZE}}', str(game.size))
+
+    output = output.replace(
+        '{{GENERATED_TRAJECTORY}}',
+        json.dumps([p.trajectory for p in game.players]))
+
+    return output
+
+
+def main(argv):
+    """Script starting point.
+
+    Args:
+        argv (list): List of command-line arguments.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='python[3] simulator.py render',
+        description='Render recorded games as HTML replays.')
+    parser.add_argument(
+        '--file', default='replays/replays.hxr', help='the file of records')
+    parser.add_argument(
+        'numbers', type=int, nargs='*',
+        help='the numbers of the games to render, by default the last one')
+    parser.add_argument('--output', default='replays',
+                        help='the directory to write the replays to')
+    args = parser.parse_args(argv[1:])
+
+    records = read(args.file)
+    numbers = args.numbers or [len(records) - 1]
+    os.makedirs(args.output, exist_ok=True)
+
+    for number in numbers:
+        game, agents = replay(records[number])
+        path = os.path.join(args.output, 'replay%d.html' % number)
+        with open(path, 'w', encoding='utf8') as outfile:
+            outfile.write(render(game, agents))
+
+        print('A replay of game %d has been written to "%s".' % (
+            number, path))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,178 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from benchmark import benchmark_engine
+from game import Hexatron
+from topology import get_topology
+
+sys.path.append('agents')
+sys.path.append('agents/old')
+
+
+def check_tables(module, size):
+    """Check the tables of the playing field an agent builds itself, such
+    as those of v10-5, against those of `topology`. Agents are submitted as
+    a single file, so they cannot share the simulator's tables.
+
+    Args:
+        module (module): The agent.
+        size (int): Size of the (outer) square grid.
+
+    Returns:
+        error (str): None if all tables the agent has match, or a
+            description of the first that does not.
+    """
+
+    topology = get_topology(size)
+    expected = {
+        'get_positions': topology.positions,
+        'get_nodes': topology.nodes,
+        'get_next_nodes': topology.next_nodes}
+
+    for name, tables in expected.items():
+        function = getattr(module, name, None)
+        if function is None:
+            continue
+
+        try:
+            actual = function(size)
+        except TypeError:
+            # Older agents have hard-coded tables of the 13-board
+            if size != 13:
+                continue
+            actual = function()
+
+        if actual != tables:
+            return '{}({}) differs from the topology'.format(name, size)
+
+    return None
+
+
+def measure_agent(module, size, games, seed):
+    """Measure the latency of an agent's moves, while it plays itself.
+
+    Args:
+        module (module): The agent.
+        size (int): Size of the (outer) square grid.
+        games (int): Number of games to play.
+        seed (int): The seed of the starts.
+
+    Returns:
+        result (dict): The number of moves, and the mean, median, 99th
+            percentile and maximum latency in seconds. If the agent raised
+            an exception, such as exceeding its own time budget, `error`
+            describes it, and the latencies cover the moves before it. An
+            agent whose tables differ from the topology, see
+            `check_tables`, does not play.
+    """
+
+    latencies = []
+    error = check_tables(module, size)
+
+    for idx in range(games):
+        game = Hexatron(size)
+        observation = game.reset(seed=seed + idx)
+
+        done = False
+        while not done and error is None:
+            views = [
+                (observation['board'],
+                 observation['positions'],
+                 observation['orientations']),
+                (observation['board'][:, :, ::-1],
+                 observation['positions'][::-1],
+                 observation['orientations'][::-1])]
+
+            moves = []
+            for board, positions, orientations in views:
+                t0 = time.perf_counter()
+                try:
+                    moves.append(
+                        module.generate_move(board, positions, orientations))
+                except Exception as e:
+                    error = '{}: {}'.format(type(e).__name__, e)
+                    break
+                latencies.append(time.perf_counter() - t0)
+
+            if error is None:
+                observation, done, _ = game.act(*moves)
+
+        if error is not None:
+            break
+
+    result = {'moves': len(latencies), 'error': error}
+    if latencies:
+        result.update({
+            'mean': float(np.mean(latencies)),
+            'p50': float(np.percentile(latencies, 50)),
+            'p99': float(np.percentile(latencies, 99)),
+            'max': float(np.max(latencies))})
+
+    return result
+
+
+def main(argv):
+    """Script starting point.
+
+    Args:
+        argv (list): List of command-line arguments.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='python[3] simulator-files/scaling.py',
+        description='Report how the engine and the agents scale with the '
+                    'size of the playing field.')
+    parser.add_argument('agents', nargs='*', default=['v10-5', 'v8-4'])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=list(range(9, 27, 4)))
+    parser.add_argument('--games', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this file')
+    args = parser.parse_args(argv[1:])
+
+    modules = [
+        importlib.import_module(os.path.splitext(agent)[0])
+        for agent in args.agents]
+
+    results = []
+    for size in args.sizes:
+        engine = benchmark_engine(size, False, 'float', 50, args.seed)
+        result = {
+            'size': size,
+            'engine_step_seconds': 1 / engine['act_per_second'],
+            'agents': {}}
+
+        for agent, module in zip(args.agents, modules):
+            result['agents'][agent] = measure_agent(
+                module, size, args.games, args.seed)
+
+        results.append(result)
+
+        print('size %2d: engine step %7.1f us' % (
+            size, 1e6 * result['engine_step_seconds']), file=sys.stderr)
+        for agent, latency in result['agents'].items():
+            if 'max' in latency:
+                print('  %-12s p50 %8.1f ms, max %8.1f ms' % (
+                    agent, 1e3 * latency['p50'], 1e3 * latency['max']),
+                    file=sys.stderr)
+            if latency['error'] is not None:
+                print('  %-12s %s' % (agent, latency['error']),
+                      file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as outfile:
+            outfile.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
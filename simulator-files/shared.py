@@ -0,0 +1,239 @@
+"""A ring buffer of finished games in shared memory, see `GameBuffer`.
+Worker processes put the games they play into it, and the parent reads
+them, without sending them through a pipe:
+
+    def play(name, lock, seed):
+        games = GameBuffer(64, name=name, lock=lock)
+        game = Hexatron(13)
+        game.reset(seed=seed)
+        done = False
+        while not done:
+            _, done, status = game.act(0, 0)
+        games.put(game, status)
+        games.close()
+
+    lock = multiprocessing.Lock()
+    games = GameBuffer(64, lock=lock)
+    workers = [multiprocessing.Process(target=play,
+                                       args=(games.name, lock, seed))
+               for seed in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    for number in games.available():
+        print(games.read(number))
+    games.close()
+    games.unlink()
+"""
+
+import contextlib
+import struct
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from game import get_snapshot_format
+from topology import get_topology
+
+
+class GameBuffer:
+
+    def __init__(self, capacity, size=13, name=None, lock=None,
+                 num_players=2):
+        """Constructor. Creates a ring buffer of finished games in shared
+        memory, or attaches to an existing one by name.
+
+        The fields of the games are NumPy arrays backed by the shared memory.
+        Game number `n` is kept in slot `n % capacity`, until it is
+        overwritten `capacity` games later. Reading the fields directly is
+        only safe once all writers have stopped: a writer may overwrite a
+        slot while it is being read. Use `read` while writers are running.
+
+        Args:
+            capacity (int): Number of games the buffer holds.
+            size (int): Size of the (outer) square grid of the games.
+            name (str): The name of an existing buffer to attach to, see
+                `name`. If None, a new buffer is created.
+            lock (multiprocessing.Lock): A lock shared by all processes that
+                write to the buffer. Only needed if several processes write
+                to it.
+            num_players (int): The number of players of the games.
+        """
+
+        self.capacity = capacity
+        self.size = size
+        self.lock = lock
+        self.num_players = num_players
+
+        num_cells = get_topology(size).num_cells
+        # A player makes at most one step per cell, and one into a crash
+        self.max_turns = num_cells + 1
+        snapshot_size = (struct.calcsize(get_snapshot_format(num_players)) +
+                         num_players * ((num_cells + 7) // 8))
+
+        # Largest items first, which keeps every field aligned
+        fields = [
+            # counter[0]: the number of games put into the buffer so far
+            ('counter', np.int64, [1]),
+            # sequence[slot]: the game number plus 1, once it is complete
+            ('sequence', np.int64, [capacity]),
+            # turns[slot]: the number of turns played
+            ('turns', np.int32, [capacity]),
+            # lengths[slot, player]: the number of steps of a player, which
+            # is smaller than the turns for players that crashed early
+            ('lengths', np.int32, [capacity, num_players]),
+            # starts[slot]: the start, see `Hexatron.starts`, or -1 for a
+            # game restored from a snapshot
+            ('starts', np.int8, [capacity, 2 + num_players]),
+            # status[slot]: the final status of every player
+            ('status', np.int8, [capacity, num_players]),
+            # trajectories[slot, player, turn]: the orientation of a player
+            # after a turn, see `Player.orientations`, and 0 past its length
+            ('trajectories', np.uint8,
+             [capacity, num_players, self.max_turns]),
+            # snapshots[slot]: the final state, see `Hexatron.snapshot`
+            ('snapshots', np.uint8, [capacity, snapshot_size])]
+
+        nbytes = sum(np.dtype(dtype).itemsize * int(np.prod(shape))
+                     for _, dtype, shape in fields)
+
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=nbytes)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+
+        offset = 0
+        for field, dtype, shape in fields:
+            array = np.ndarray(
+                shape, dtype=dtype, buffer=self.memory.buf, offset=offset)
+            setattr(self, field, array)
+            offset += array.nbytes
+
+        if name is None:
+            self.counter[0] = 0
+            self.sequence[:] = 0
+
+    @property
+    def name(self):
+        """The name of the shared memory, to attach from other processes."""
+
+        return self.memory.name
+
+    def put(self, game, status):
+        """Write a finished game into the next slot.
+
+        Args:
+            game (Hexatron): The finished game.
+            status (List[int]): The final status of every player, as
+                returned by `Hexatron.act`.
+
+        Returns:
+            number (int): The number of the game.
+        """
+
+        with self.lock or contextlib.nullcontext():
+            number = int(self.counter[0])
+            self.counter[0] = number + 1
+
+        slot = number % self.capacity
+        self.sequence[slot] = 0
+
+        self.turns[slot] = game.turn
+        self.starts[slot] = -1 if game.start is None else game.start
+        self.status[slot] = status
+        # Clear the trajectories of the game that was in the slot before
+        self.trajectories[slot] = 0
+        for idx, player in enumerate(game.players):
+            length = len(player.orientations)
+            self.lengths[slot, idx] = length
+            self.trajectories[slot, idx, :length] = \
+                np.frombuffer(player.orientations, dtype=np.uint8)
+        self.snapshots[slot] = np.frombuffer(game.snapshot(), dtype=np.uint8)
+
+        self.sequence[slot] = number + 1
+        return number
+
+    def available(self, since=0):
+        """Return the numbers of the complete games that are still in the
+        buffer.
+
+        Args:
+            since (int): Only return games from this number on.
+
+        Returns:
+            numbers (list): The game numbers, in order.
+        """
+
+        counter = int(self.counter[0])
+        numbers = range(max(since, counter - self.capacity), counter)
+        return [number for number in numbers
+                if self.sequence[number % self.capacity] == number + 1]
+
+    def read(self, number):
+        """Copy a game out of the buffer. The slot is checked before and
+        after copying, so a game that a writer overwrote in the meantime is
+        never returned half old and half new.
+
+        Args:
+            number (int): The number of the game.
+
+        Returns:
+            game (dict): None if the game is not, or no longer, in the
+                buffer. Otherwise its number, the number of turns, the
+                start (None for a game restored from a snapshot), the final
+                status of every player, the trajectory of every player as
+                bytes (see `Player.orientations`), and the final snapshot.
+        """
+
+        slot = self.slot(number)
+        if self.sequence[slot] != number + 1:
+            return None
+
+        lengths = self.lengths[slot].tolist()
+        start = tuple(self.starts[slot].tolist())
+        if start[0] < 0:
+            start = None
+
+        game = {
+            'number': number,
+            'turns': int(self.turns[slot]),
+            'start': start,
+            'status': self.status[slot].tolist(),
+            'trajectories': [
+                self.trajectories[slot, idx, :length].tobytes()
+                for idx, length in enumerate(lengths)],
+            'snapshot': self.snapshots[slot].tobytes()}
+
+        # A writer that took the slot meanwhile has changed its sequence
+        if self.sequence[slot] != number + 1:
+            return None
+
+        return game
+
+    def slot(self, number):
+        """Return the slot of a game, for indexing the fields.
+
+        Args:
+            number (int): The number of the game.
+
+        Returns:
+            slot (int): The slot.
+        """
+
+        return number % self.capacity
+
+    def close(self):
+        """Detach from the shared memory."""
+
+        for field in ['counter', 'sequence', 'turns', 'lengths', 'starts',
+                      'status', 'trajectories', 'snapshots']:
+            delattr(self, field)
+        self.memory.close()
+
+    def unlink(self):
+        """Free the shared memory. Call this once, from the process that
+        created the buffer, after all processes have closed it."""
+
+        self.memory.unlink()
@@ -0,0 +1,214 @@
+import datetime
+import os
+import sqlite3
+
+from cache import hash_agent
+
+SCHEMA = '''
+-- Every version of every agent: an edited agent is a new row
+CREATE TABLE IF NOT EXISTS agents (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    lines INTEGER NOT NULL,
+    added TEXT NOT NULL,
+    UNIQUE (name, sha256));
+
+-- Every game, from the point of view of player 1 (agent_one). The start
+-- is that of `Hexatron.STARTS`, the status that of `Status`, and the
+-- reason that of `tournament.play_game`.
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    agent_one INTEGER NOT NULL REFERENCES agents (id),
+    agent_two INTEGER NOT NULL REFERENCES agents (id),
+    vertical_distance INTEGER NOT NULL,
+    horizontal_distance INTEGER NOT NULL,
+    orientation_one INTEGER NOT NULL,
+    orientation_two INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    seed INTEGER,
+    adjudicate INTEGER NOT NULL,
+    deadline REAL,
+    turns INTEGER NOT NULL,
+    score_one REAL NOT NULL,
+    status_one INTEGER NOT NULL,
+    status_two INTEGER NOT NULL,
+    reason_one TEXT,
+    reason_two TEXT,
+    UNIQUE (agent_one, agent_two, vertical_distance, horizontal_distance,
+            orientation_one, orientation_two, size, seed, adjudicate,
+            deadline));
+
+-- Every move of every game, with the time the agent took for it
+CREATE TABLE IF NOT EXISTS moves (
+    game INTEGER NOT NULL REFERENCES games (id),
+    turn INTEGER NOT NULL,
+    player INTEGER NOT NULL,
+    move INTEGER NOT NULL,
+    latency REAL,
+    PRIMARY KEY (game, turn, player)) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS games_agents ON games (agent_one, agent_two);
+CREATE INDEX IF NOT EXISTS moves_turn ON moves (turn);
+'''
+
+
+class ResultStore:
+
+    def __init__(self, path='results/games.sqlite3', batch=500):
+        """Constructor. Opens a database of games, their moves and the
+        agents that played them, creating it if needed.
+
+        Results are inserted in batches, each in a single transaction. A game
+        that is already stored, such as a seeded game that was served from
+        the cache, is not inserted again.
+
+        Args:
+            path (str): The file of the database.
+            batch (int): The number of games to insert at once.
+        """
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.batch = batch
+        self.pending = []
+
+        # agents[name]: the id of the current version of an agent
+        self.agents = {}
+
+    def agent(self, agent):
+        """Return the id of the current version of an agent, adding it if
+        needed.
+
+        Args:
+            agent (str): The module name of the agent.
+
+        Returns:
+            id (int): The id in the agents table.
+        """
+
+        if agent not in self.agents:
+            path, digest = hash_agent(agent)
+            with open(path, 'rb') as infile:
+                lines = infile.read().count(b'\n')
+
+            self.connection.execute(
+                'INSERT OR IGNORE INTO agents (name, path, sha256, lines, '
+                'added) VALUES (?, ?, ?, ?, ?)',
+                (agent, path, digest, lines,
+                 datetime.datetime.now().isoformat(timespec='seconds')))
+            self.agents[agent], = self.connection.execute(
+                'SELECT id FROM agents WHERE name = ? AND sha256 = ?',
+                (agent, digest)).fetchone()
+
+        return self.agents[agent]
+
+    def add(self, result):
+        """Add the result of a game, which is inserted with the next batch.
+
+        Args:
+            result (dict): See `tournament.play_game`.
+        """
+
+        self.pending.append(result)
+        if len(self.pending) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        """Insert all pending results, in a single transaction."""
+
+        with self.connection:
+            for result in self.pending:
+                self._insert(result)
+
+        self.pending = []
+
+    def _insert(self, result):
+        """Insert a game and its moves.
+
+        Args:
+            result (dict): See `tournament.play_game`.
+        """
+
+        cursor = self.connection.execute(
+            'INSERT OR IGNORE INTO games (agent_one, agent_two, '
+            'vertical_distance, horizontal_distance, orientation_one, '
+            'orientation_two, size, seed, adjudicate, deadline, turns, '
+            'score_one, status_one, status_two, reason_one, reason_two) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [self.agent(agent) for agent in result['agents']] +
+            result['start'] +
+            [result['size'], result['seed'], result['adjudicate'],
+             result['deadline'], result['turns'], result['scores'][0]] +
+            result['status'] + result['reasons'])
+
+        if cursor.rowcount == 0:
+            return
+
+        self.connection.executemany(
+            'INSERT INTO moves VALUES (?, ?, ?, ?, ?)',
+            [(cursor.lastrowid, turn, player, move, latency)
+             for player, (moves, latencies) in enumerate(
+                 zip(result['moves'], result['latencies']))
+             for turn, (move, latency) in enumerate(zip(moves, latencies))])
+
+    def query(self, sql, parameters=()):
+        """Run a query on the stored games, after inserting the pending
+        results.
+
+        Args:
+            sql (str): The query.
+            parameters (tuple): The parameters of the query.
+
+        Returns:
+            rows (list): The rows of the result.
+        """
+
+        self.flush()
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def win_rate(self, agent, opponent, orientation=None):
+        """Return the score of an agent against an opponent, over all
+        versions of both, as player 1 and as player 2.
+
+        Args:
+            agent (str): The module name of the agent.
+            opponent (str): The module name of the opponent.
+            orientation (int): If given, only count the games in which the
+                agent started in this orientation, as player 1 sees it. The
+                start of player 2 is that of player 1 turned by 180 degrees,
+                which is undone, so both sides start in orientation 1 or 2.
+
+        Returns:
+            games (int): The number of games.
+            score (float): The fraction of the points the agent scored, or
+                None if they have not played.
+        """
+
+        rows = self.query(
+            'SELECT COUNT(*), SUM(score) FROM ('
+            '  SELECT g.score_one AS score, g.orientation_one AS orientation'
+            '  FROM games g JOIN agents a ON a.id = g.agent_one'
+            '  JOIN agents b ON b.id = g.agent_two'
+            '  WHERE a.name = ? AND b.name = ?'
+            '  UNION ALL'
+            '  SELECT 1 - g.score_one, (g.orientation_two + 3) % 6'
+            '  FROM games g JOIN agents a ON a.id = g.agent_two'
+            '  JOIN agents b ON b.id = g.agent_one'
+            '  WHERE a.name = ? AND b.name = ?)'
+            'WHERE ? IS NULL OR orientation = ?',
+            (agent, opponent, agent, opponent, orientation, orientation))
+
+        games, score = rows[0]
+        return games, None if games == 0 else score / games
+
+    def close(self):
+        """Insert all pending results, and close the database."""
+
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,183 @@
+import numpy as np
+
+from topology import STEPS, get_topology
+
+# The symmetries of the hexagon as matrices acting on the (x, y) offset from
+# the center: 6 rotations by 60 degrees, each optionally preceded by a
+# reflection. The reflection swaps the axes, and reverses the direction of
+# turns, so a move of `m` becomes `-m` under transforms 6 to 11.
+_ROTATE = np.array([[0, -1], [1, 1]])
+_REFLECT = np.array([[0, 1], [1, 0]])
+MATRICES = (
+    [np.linalg.matrix_power(_ROTATE, k) for k in range(6)] +
+    [np.linalg.matrix_power(_ROTATE, k) @ _REFLECT for k in range(6)])
+INVERSES = [
+    next(u for u, inverse in enumerate(MATRICES)
+         if (inverse @ matrix == np.eye(2)).all())
+    for matrix in MATRICES]
+
+
+class Symmetries:
+
+    def __init__(self, size):
+        """Constructor. Use `get_symmetries` instead, which builds the
+        tables only once per size.
+
+        Args:
+            size (int): Size of the (outer) square grid. Must be odd, for the
+                playing field to be a regular hexagon.
+        """
+
+        if size % 2 == 0:
+            raise ValueError('The playing field of size {} has no hexagonal '
+                             'symmetry.'.format(size))
+
+        self.size = size
+        self.topology = get_topology(size)
+
+        # (x, y) offsets of the steps, in the order of the orientations
+        steps = [(dx, dy) for dy, dx in STEPS]
+
+        # cells[t][cell]: the image of a cell under transform `t`
+        # orientations[t][orientation]: the image of an orientation
+        self.cells = []
+        self.orientations = []
+        for matrix in MATRICES:
+            images = [self.position(matrix, (x, y))
+                      for x, y in self.topology.positions]
+            self.cells.append(np.array(
+                [self.topology.index[y + 1, x + 1] for x, y in images]))
+            self.orientations.append([
+                steps.index(tuple(matrix @ step)) for step in steps])
+
+    def position(self, matrix, position):
+        """Map an (x, y) position, which may lie outside the playing field.
+
+        Args:
+            matrix (np.array): One of `MATRICES`.
+            position (tuple): The position, as `(x, y)`.
+
+        Returns:
+            position (tuple): The image of the position, as `(x, y)`.
+        """
+
+        halfsize = self.size // 2
+        x, y = matrix @ (position[0] - halfsize, position[1] - halfsize)
+        return int(x) + halfsize, int(y) + halfsize
+
+
+_SYMMETRIES = {}
+
+
+def get_symmetries(size):
+    """Return the symmetry tables of the playing field, building them once
+    per size.
+
+    Args:
+        size (int): Size of the (outer) square grid.
+
+    Returns:
+        symmetries (Symmetries): The shared tables for this size.
+    """
+
+    if size not in _SYMMETRIES:
+        _SYMMETRIES[size] = Symmetries(size)
+
+    return _SYMMETRIES[size]
+
+
+def transform(board, positions, orientations, transformation):
+    """Apply a symmetry to a state of the game.
+
+    Args:
+        board (np.array): The playing field, represented as 3D array.
+        positions (tuple): The positions of both players, as `(x, y)`.
+        orientations (tuple): The orientations of both players.
+        transformation (tuple): A tuple `(t, swap)`, where `t` indexes
+            `MATRICES`, and `swap` is True if the players are exchanged
+            afterwards.
+
+    Returns:
+        board (np.array): The transformed playing field.
+        positions (tuple): The transformed positions.
+        orientations (tuple): The transformed orientations.
+    """
+
+    t, swap = transformation
+    symmetries = get_symmetries(board.shape[0])
+    ys, xs = symmetries.topology.cells.T
+    ys2, xs2 = symmetries.topology.cells[symmetries.cells[t]].T
+
+    new_board = np.zeros_like(board)
+    new_board[ys2, xs2] = board[ys, xs]
+    positions = tuple(symmetries.position(MATRICES[t], position)
+                      for position in positions)
+    orientations = tuple(symmetries.orientations[t][orientation]
+                         for orientation in orientations)
+
+    if swap:
+        new_board = new_board[:, :, ::-1].copy()
+        return new_board, positions[::-1], orientations[::-1]
+
+    return new_board, positions, orientations
+
+
+def invert(transformation):
+    """Return the transformation that undoes another one.
+
+    Args:
+        transformation (tuple): See `transform`.
+
+    Returns:
+        transformation (tuple): The inverse transformation.
+    """
+
+    t, swap = transformation
+    return INVERSES[t], swap
+
+
+def canonicalize(board, positions, orientations, swap=False):
+    """Map a state of the game to the canonical representative of all its
+    symmetric states. Equivalent states give the same representative.
+
+    Args:
+        board (np.array): The playing field, represented as 3D array.
+        positions (tuple): The positions of both players, as `(x, y)`.
+        orientations (tuple): The orientations of both players.
+        swap (bool): If True, states with the players exchanged are
+            considered equivalent too.
+
+    Returns:
+        state (tuple): The canonical `(board, positions, orientations)`.
+        key (bytes): A compact key that identifies the canonical state.
+        transformation (tuple): The transformation that maps the state onto
+            its representative, see `transform`.
+    """
+
+    symmetries = get_symmetries(board.shape[0])
+    ys, xs = symmetries.topology.cells.T
+    trails = board[ys, xs] > 0
+
+    best = None
+    for swapped in ([False, True] if swap else [False]):
+        for t, matrix in enumerate(MATRICES):
+            images = np.empty_like(trails)
+            images[symmetries.cells[t]] = trails
+            heads = [symmetries.position(matrix, position)
+                     for position in positions]
+            turns = [symmetries.orientations[t][orientation]
+                     for orientation in orientations]
+
+            if swapped:
+                images = images[:, ::-1]
+                heads, turns = heads[::-1], turns[::-1]
+
+            key = (np.array(heads + [turns], dtype=np.int16).tobytes() +
+                   np.packbits(images).tobytes())
+
+            if best is None or key < best[0]:
+                best = key, (t, swapped)
+
+    key, transformation = best
+    state = transform(board, positions, orientations, transformation)
+    return state, key, transformation
@@ -0,0 +1,102 @@
+import numpy as np
+
+STEPS = [(-1, 0),  # NW
+         (-1, 1),  # NE
+         (0, 1),   # E
+         (1, 0),   # SE
+         (1, -1),  # SW
+         (0, -1)]  # W
+
+# MOVES[orientation][free]: the 5-bit mask of legal moves -2..2 (bit 0 for
+# -2, bit 4 for 2) of a player with an orientation, on a cell with a 6-bit
+# mask `free` of the orientations in which the neighbour is free
+MOVES = [
+    [sum(1 << (move + 2) for move in range(-2, 3)
+         if free >> ((orientation + move) % 6) & 1)
+     for free in range(64)]
+    for orientation in range(6)]
+
+
+class Topology:
+
+    def __init__(self, size):
+        """Constructor. Use `get_topology` instead, which builds the tables
+        only once per size.
+
+        Cells are numbered row by row (Y first, then X), the same order the
+        agents use for their nodes.
+
+        Args:
+            size (int): Size of the (outer) square grid, that will contain the
+                hexagonal playing field. Odd sizes give a regular hexagon.
+        """
+
+        self.size = size
+        self.halfsize = size // 2
+
+        # The index has a border of one cell, so that a player that just left
+        # the playing field can still be looked up
+        index = np.full([size + 2, size + 2], -1, dtype=int)
+        cells = []
+        for y in range(size):
+            for x in range(size):
+                if self.halfsize <= x + y < size + self.halfsize:
+                    index[y + 1, x + 1] = len(cells)
+                    cells.append((y, x))
+
+        self.num_cells = len(cells)
+        self.center = int(index[self.halfsize + 1, self.halfsize + 1])
+
+        # index[y + 1, x + 1]: the cell at (y, x), or -1 outside the field
+        self.index = index
+        # cells[cell]: the (y, x) coordinates of a cell
+        self.cells = np.array(cells, dtype=int)
+        # neighbours[cell, orientation]: the cell reached by moving in an
+        # orientation, or -1 for a wall
+        self.neighbours = np.array([
+            [index[y + 1 + dy, x + 1 + dx] for dy, dx in STEPS]
+            for y, x in cells], dtype=int)
+        # walls[cell, orientation]: True if moving in an orientation crashes
+        # into a wall
+        self.walls = self.neighbours < 0
+        # boundary[cell]: True for the cells along the edge of the field
+        self.boundary = self.walls.any(axis=1)
+        self.boundary_mask = sum(
+            1 << int(cell) for cell in np.flatnonzero(self.boundary))
+        # free[cell]: the 6-bit mask of orientations without a wall, see
+        # `MOVES`
+        self.free = (~self.walls * (1 << np.arange(6))).sum(axis=1)
+
+        # Plain lists, which are faster for looking up single values
+        self.index_list = self.index.tolist()
+        self.cells_list = [tuple(cell) for cell in cells]
+        self.neighbours_list = self.neighbours.tolist()
+        self.free_list = self.free.tolist()
+
+        # The same tables in the (x, y) convention of the agents, with None
+        # for a wall
+        self.positions = [(x, y) for y, x in cells]
+        self.nodes = {position: node
+                      for node, position in enumerate(self.positions)}
+        self.next_nodes = [
+            [None if node < 0 else node for node in nodes]
+            for nodes in self.neighbours_list]
+
+
+_TOPOLOGIES = {}
+
+
+def get_topology(size):
+    """Return the topology of the playing field, building it once per size.
+
+    Args:
+        size (int): Size of the (outer) square grid.
+
+    Returns:
+        topology (Topology): The shared tables for this size.
+    """
+
+    if size not in _TOPOLOGIES:
+        _TOPOLOGIES[size] = Topology(size)
+
+    return _TOPOLOGIES[size]
@@ -0,0 +1,451 @@
+import argparse
+import concurrent.futures
+import itertools
+import os
+import random
+import sys
+
+import numpy as np
+
+from cache import ResultCache
+from game import Hexatron, Status, rotate
+from latency import LatencyReport
+from rating import Ratings
+from replay import ReplayFile, encode
+from store import ResultStore
+from workers import Forfeit, get_worker, is_transient
+
+AGENT_DIRECTORIES = ['agents', 'agents/old']
+for directory in AGENT_DIRECTORIES:
+    if directory not in sys.path:
+        sys.path.append(directory)
+
+# Why a player lost, see `Status`. An agent that raises an exception,
+# returns anything but a move, or exceeds the deadline forfeits the game.
+REASONS = {
+    Status.CRASHED_INTO_WALL: 'wall',
+    Status.CRASHED_INTO_OPPONENT: 'tail',
+    Status.CRASHED_HEAD_ON: 'head-on'}
+FORFEIT = 'forfeit'
+
+
+def find_agents(directories=AGENT_DIRECTORIES):
+    """Return all agents in the given directories, which are the Python
+    files that define `generate_move`.
+
+    Args:
+        directories (list): The directories to search.
+
+    Returns:
+        agents (list): The module names of the agents, sorted.
+    """
+
+    agents = []
+    for directory in directories:
+        for filename in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(filename)
+            if extension != '.py':
+                continue
+
+            path = os.path.join(directory, filename)
+            with open(path, 'r', encoding='utf8') as infile:
+                if 'def generate_move(' in infile.read():
+                    agents.append(name)
+
+    return sorted(agents)
+
+
+def play_game(agents, start, size=13, adjudicate=False, deadline=1.0,
+              seed=0):
+    """Play a single game between two agents. The agents run in worker
+    processes, which this process keeps for later games, see `get_worker`.
+
+    Args:
+        agents (tuple): The module names of player 1 and player 2.
+        start (tuple): One of `Hexatron.STARTS`.
+        size (int): Size of the (outer) square grid.
+        adjudicate (bool): If True, stop the game as soon as the agents can
+            no longer reach each other, see `Hexatron.adjudicate`.
+        deadline (float): The time in seconds an agent has for every move.
+            An agent that exceeds it forfeits the game.
+        seed (int): The seed of the random generators of the agents, see
+            `AgentWorker.seed`.
+
+    Returns:
+        result (dict): The arguments, and the number of turns of the game,
+            with for every player:
+                - scores: 1 for a win, 0.5 for a draw and 0 for a loss
+                - status: the final status, see `Status`
+                - reasons: None if the player did not crash, else one of
+                    `REASONS`, `FORFEIT` or 'adjudicated'
+                - errors: None, or why the player forfeited
+                - moves: the moves the player made
+                - latencies: the time in seconds of every move of the
+                    player, including a last one that forfeited, see
+                    `AgentWorker.move`
+    """
+
+    workers = [get_worker(agent, deadline) for agent in agents]
+
+    game = Hexatron(size)
+    observation = game.reset(start=start)
+
+    reasons = [None, None]
+    errors = [None, None]
+    latencies = [[], []]
+    played = [[], []]
+    status = [Status.VALID, Status.VALID]
+    done = False
+
+    for idx, worker in enumerate(workers):
+        try:
+            worker.seed(seed)
+        except Forfeit as e:
+            errors[idx] = str(e)
+            reasons[idx] = FORFEIT
+
+    while not done and not any(reasons):
+        moves = []
+        for idx, worker in enumerate(workers):
+            view = rotate(observation, idx)
+            try:
+                moves.append(worker.move(
+                    view['board'], view['positions'], view['orientations']))
+            except Forfeit as e:
+                errors[idx] = str(e)
+                reasons[idx] = FORFEIT
+
+            # A move that forfeited counts too, a timeout with the deadline
+            if worker.latency is not None:
+                latencies[idx].append(worker.latency)
+
+        if any(reasons):
+            break
+
+        observation, done, status = game.act(*moves)
+        reasons = [REASONS.get(s) for s in status]
+        for idx, move in enumerate(moves):
+            played[idx].append(move)
+
+        if adjudicate and not done:
+            done = game.adjudicate() is not None
+
+    if game.adjudicated is not None:
+        steps = game.adjudicated
+        reasons = [None if s >= max(steps) else 'adjudicated' for s in steps]
+
+    if all(reasons) or not any(reasons):
+        scores = [0.5, 0.5]
+    else:
+        scores = [0.0 if reason else 1.0 for reason in reasons]
+
+    return {
+        'agents': list(agents),
+        'start': [int(value) for value in start],
+        'size': size,
+        'adjudicate': adjudicate,
+        'deadline': deadline,
+        'seed': seed,
+        'turns': game.turn,
+        'scores': scores,
+        'status': [int(s) for s in status],
+        'reasons': reasons,
+        'errors': errors,
+        'moves': played,
+        'latencies': latencies}
+
+
+def schedule(agents, starts):
+    """Return all games of a round robin: every pair of agents plays every
+    start twice, once with each agent as player 1.
+
+    Args:
+        agents (list): The module names of the agents.
+        starts (list): The starts, see `Hexatron.STARTS`.
+
+    Returns:
+        games (list): A list of tuples `(agents, start)`.
+    """
+
+    games = []
+    for pair in itertools.combinations(agents, 2):
+        for start in starts:
+            games.append((pair, start))
+            games.append((pair[::-1], start))
+
+    return games
+
+
+def run_tournament(agents, starts, size=13, adjudicate=False, deadline=1.0,
+                   seed=0, cache=None, workers=None, callback=None):
+    """Play a round robin between agents, over a pool of processes. Games
+    in the cache are not played again.
+
+    Args:
+        agents (list): The module names of the agents.
+        starts (list): The starts, see `Hexatron.STARTS`.
+        size (int): Size of the (outer) square grid.
+        adjudicate (bool): See `play_game`.
+        deadline (float): See `play_game`.
+        seed (int): See `play_game`.
+        cache (ResultCache): If given, the cache to look up the results in,
+            and to add the results of the games played to. Games an agent
+            forfeited by a timeout are not added, see `is_transient`.
+        workers (int): The number of processes. Defaults to the number of
+            processors.
+        callback (function): If given, called with every result, as soon as
+            its game is over, or is found in the cache.
+
+    Returns:
+        results (list): The results of all games, see `play_game`, in the
+            order of `schedule`.
+    """
+
+    games = schedule(agents, starts)
+    results = [None] * len(games)
+    keys = [None] * len(games)
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = {}
+        for idx, (pair, start) in enumerate(games):
+            if cache is not None:
+                keys[idx] = cache.key(
+                    pair, start, seed, size, adjudicate, deadline)
+                results[idx] = cache.get(keys[idx])
+
+            if results[idx] is None:
+                futures[executor.submit(
+                    play_game, pair, start, size, adjudicate, deadline,
+                    seed)] = idx
+            elif callback is not None:
+                callback(results[idx])
+
+        for played, future in enumerate(
+                concurrent.futures.as_completed(futures)):
+            idx = futures[future]
+            results[idx] = future.result()
+
+            # A timeout may not happen again, so the game is played again
+            # by the next run
+            if cache is not None and not any(
+                    is_transient(error) for error in results[idx]['errors']):
+                cache.put(keys[idx], results[idx])
+                # Keep the results played so far, if the run is interrupted
+                if played % 100 == 99:
+                    cache.commit()
+
+            if callback is not None:
+                callback(results[idx])
+
+    if cache is not None:
+        cache.commit()
+
+    return results
+
+
+class CrossTable:
+
+    def __init__(self, agents):
+        """Constructor. Creates an empty cross table.
+
+        Args:
+            agents (list): The module names of the agents.
+        """
+
+        self.agents = list(agents)
+        self.index = {agent: idx for idx, agent in enumerate(self.agents)}
+
+        # wins[i, j]: the number of games agent i won against agent j, and
+        # likewise for draws and losses
+        shape = [len(self.agents), len(self.agents)]
+        self.wins = np.zeros(shape, dtype=int)
+        self.draws = np.zeros(shape, dtype=int)
+        self.losses = np.zeros(shape, dtype=int)
+
+        # reasons[agent][reason]: how often a game an agent did not win
+        # ended for a reason, which includes crashing in a draw
+        self.reasons = {agent: {} for agent in self.agents}
+
+    def add(self, result):
+        """Add the result of a game.
+
+        Args:
+            result (dict): See `play_game`.
+        """
+
+        one, two = [self.index[agent] for agent in result['agents']]
+        score = result['scores'][0]
+
+        if score == 1:
+            self.wins[one, two] += 1
+            self.losses[two, one] += 1
+        elif score == 0:
+            self.losses[one, two] += 1
+            self.wins[two, one] += 1
+        else:
+            self.draws[one, two] += 1
+            self.draws[two, one] += 1
+
+        for agent, reason in zip(result['agents'], result['reasons']):
+            if reason is not None:
+                reasons = self.reasons[agent]
+                reasons[reason] = reasons.get(reason, 0) + 1
+
+    def scores(self):
+        """Return the score of every agent against every other agent.
+
+        Returns:
+            scores (np.array): A square array, containing the fraction of
+                points agent i scored against agent j, or NaN if they have
+                not played.
+        """
+
+        games = self.wins + self.draws + self.losses
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self.wins + 0.5 * self.draws) / games
+
+    def format(self):
+        """Return the cross table as text, with the agents sorted by their
+        total score, followed by how the games they did not win ended.
+
+        Returns:
+            text (str): The table.
+        """
+
+        wins, draws, losses = [array.sum(axis=1) for array in [
+            self.wins, self.draws, self.losses]]
+        games = np.maximum(wins + draws + losses, 1)
+        totals = (wins + 0.5 * draws) / games
+        order = np.argsort(-totals, kind='stable')
+        scores = self.scores()
+
+        width = max(len(agent) for agent in self.agents)
+        lines = ['%*s  %5s %5s %5s %6s  %s' % (
+            width + 4, '', 'W', 'D', 'L', 'score',
+            ' '.join('%3d' % (rank + 1) for rank in range(len(order))))]
+
+        for rank, i in enumerate(order):
+            cells = ['  -' if i == j or np.isnan(scores[i, j]) else
+                     '%3d' % round(100 * scores[i, j]) for j in order]
+            lines.append('%3d %-*s  %5d %5d %5d %5.1f%%  %s' % (
+                rank + 1, width, self.agents[i], wins[i], draws[i],
+                losses[i], 100 * totals[i], ' '.join(cells)))
+
+        lines += ['', 'Games not won, by reason:']
+        for i in order:
+            reasons = sorted(self.reasons[self.agents[i]].items())
+            lines.append('%-*s  %s' % (
+                width, self.agents[i],
+                ', '.join('%s %d' % item for item in reasons) or '-'))
+
+        return '\n'.join(lines)
+
+
+def main(argv):
+    """Script starting point.
+
+    Args:
+        argv (list): List of command-line arguments.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='python[3] simulator.py tournament',
+        description='Play a round robin between agents. Every pair of agents '
+                    'plays every start twice, once with each agent as '
+                    'player 1, and a cross table of the scores in percent is '
+                    'printed.')
+    parser.add_argument(
+        'agents', nargs='*',
+        help='the agents, by default all agents in {}'.format(
+            ' and '.join(AGENT_DIRECTORIES)))
+    parser.add_argument(
+        '--starts', type=int, default=len(Hexatron.STARTS),
+        help='play this many random starts, instead of all of them')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed of the random starts and the agents')
+    parser.add_argument(
+        '--size', type=int, default=13,
+        help='size of the square grid that contains the playing field')
+    parser.add_argument(
+        '--adjudicate', action='store_true',
+        help='stop games once the agents can no longer reach each other')
+    parser.add_argument(
+        '--deadline', type=float, default=1.0,
+        help='seconds an agent has for every move, before it forfeits')
+    parser.add_argument(
+        '--ratings', action='store_true',
+        help='fit Elo ratings with bootstrap confidence intervals')
+    parser.add_argument(
+        '--latency', action='store_true',
+        help='report the latencies of the moves of every agent per turn')
+    parser.add_argument(
+        '--cache', default='cache/results.sqlite3',
+        help='the cache of the results of games, which are only played '
+             'again when their agents change')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='play all games, without using the cache')
+    parser.add_argument(
+        '--replays', nargs='?', const='replays/replays.hxr',
+        help='append a record of every game to this file, by default '
+             '%(const)s, see "simulator.py render"')
+    parser.add_argument(
+        '--store', nargs='?', const='results/games.sqlite3',
+        help='record all games and moves in this database, by default '
+             '%(const)s')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes, by default one per CPU')
+    args = parser.parse_args(argv[1:])
+
+    agents = [os.path.splitext(agent)[0] for agent in args.agents]
+    agents = agents or find_agents()
+
+    starts = list(Hexatron.STARTS)
+    if args.starts < len(starts):
+        starts = random.Random(args.seed).sample(starts, args.starts)
+
+    table = CrossTable(agents)
+    latencies = LatencyReport(args.deadline)
+    ratings = Ratings(agents)
+    total = len(schedule(agents, starts))
+
+    def report(result):
+        table.add(result)
+        latencies.add_result(result)
+        ratings.add_result(result)
+        if store is not None:
+            store.add(result)
+        if replays is not None:
+            replays.append(encode(result['size'], result['start'],
+                                  result['agents'], result['moves']))
+        played = table.wins.sum() + table.draws.sum() // 2
+        print('\rPlayed %d of %d games.' % (played, total), end='',
+              file=sys.stderr)
+
+    cache = None if args.no_cache else ResultCache(args.cache)
+    store = None if args.store is None else ResultStore(args.store)
+    replays = None if args.replays is None else ReplayFile(args.replays)
+
+    run_tournament(agents, starts, args.size, args.adjudicate, args.deadline,
+                   args.seed, cache, args.workers, report)
+    print(file=sys.stderr)
+
+    if cache is not None:
+        cache.close()
+    if store is not None:
+        store.close()
+    if replays is not None:
+        replays.close()
+
+    print(table.format())
+
+    if args.ratings:
+        print()
+        print(ratings.format())
+
+    if args.latency:
+        print()
+        print(latencies.format())
+
+
+if __name__ == '__main__':
+    main(sys.argv)
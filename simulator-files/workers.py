@@ -0,0 +1,281 @@
+import collections
+import contextlib
+import importlib
+import io
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+
+# The forfeits that depend on the load of the machine, rather than on the
+# agent alone, see `is_transient`
+DEADLINE = 'Exceeded the deadline of %.3f seconds'
+DIED = 'The agent process died'
+
+
+class Forfeit(Exception):
+    """Raised when an agent does not answer a valid move in time. The agent
+    then loses the game."""
+
+
+def is_timeout(error):
+    """Return whether a forfeit is a timeout.
+
+    Args:
+        error (str): The message of the forfeit, or None.
+
+    Returns:
+        timeout (bool): True if the agent exceeded its deadline.
+    """
+
+    return error is not None and error.startswith(DEADLINE.split('%')[0])
+
+
+def is_transient(error):
+    """Return whether a forfeit may not happen again when the game is
+    played again, such as a timeout on a busy machine.
+
+    Args:
+        error (str): The message of the forfeit, or None.
+
+    Returns:
+        transient (bool): True for a timeout, or an agent process that died.
+    """
+
+    return error == DIED or is_timeout(error)
+
+
+def load_agent(agent):
+    """Import an agent, which is cached by Python per process.
+
+    Args:
+        agent (str): The module name or filename of the agent.
+
+    Returns:
+        module (module): The agent.
+    """
+
+    name, _ = os.path.splitext(agent)
+    return importlib.import_module(name)
+
+
+def _serve(agent, connection, quiet):
+    """Answer moves of an agent, until asked to stop. This is the main loop
+    of the worker process.
+
+    Args:
+        agent (str): The module name or filename of the agent.
+        connection (multiprocessing.connection.Connection): The worker's end
+            of the pipe.
+        quiet (bool): If True, discard what the agent prints.
+    """
+
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+        try:
+            module = load_agent(agent)
+        except Exception as e:
+            connection.send(('error', '{}: {}'.format(type(e).__name__, e)))
+            return
+        connection.send(('ready', None))
+
+        while True:
+            request = connection.recv()
+            if request is None:
+                return
+
+            kind, value = request
+            if kind == 'seed':
+                random.seed(value)
+                np.random.seed(value)
+                continue
+
+            try:
+                move = module.generate_move(*value)
+                connection.send(('move', move))
+            except Exception as e:
+                connection.send(
+                    ('error', '{}: {}'.format(type(e).__name__, e)))
+
+
+class AgentWorker:
+
+    def __init__(self, agent, deadline=1.0, quiet=False):
+        """Constructor. The agent is imported once, in a process of its own,
+        and then answers moves over a pipe, for as many games as needed.
+
+        Args:
+            agent (str): The module name or filename of the agent.
+            deadline (float): The wall-clock time in seconds an agent has for
+                every move, like the budget the agents enforce on
+                themselves. None to wait indefinitely.
+            quiet (bool): If True, discard what the agent prints.
+        """
+
+        self.agent = agent
+        self.deadline = deadline
+        self.quiet = quiet
+        self.process = None
+        self.connection = None
+
+        # The time in seconds the last move took, see `move`
+        self.latency = None
+
+    def start(self):
+        """Start the worker process, and wait until the agent is imported.
+        Importing is not subject to the deadline."""
+
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_serve, args=(self.agent, child, self.quiet), daemon=True)
+        self.process.start()
+        child.close()
+
+        try:
+            self._receive(None)
+        except Forfeit:
+            self.stop()
+            raise
+
+    def _receive(self, deadline):
+        """Receive an answer of the worker process.
+
+        Args:
+            deadline (float): The time to wait in seconds, or None to wait
+                indefinitely.
+
+        Returns:
+            value: The answer.
+        """
+
+        if not self.connection.poll(deadline):
+            self.stop()
+            raise Forfeit(DEADLINE % deadline)
+
+        try:
+            kind, value = self.connection.recv()
+        except EOFError:
+            self.stop()
+            raise Forfeit(DIED)
+
+        if kind == 'error':
+            raise Forfeit(value)
+
+        return value
+
+    def move(self, board, positions, orientations):
+        """Ask the agent for a move, starting the worker process if needed.
+
+        Args:
+            board (np.array): The playing field, as seen by the agent.
+            positions (tuple): The positions of the players.
+            orientations (tuple): The orientations of the players.
+
+        Returns:
+            move (int): An integer in [-2,2]. The time the agent took is
+                kept in `latency`, also when it forfeits. It is measured the
+                way the deadline is enforced, from sending the request to
+                receiving the answer, so it includes the time spent in the
+                pipe, and a timeout takes the whole deadline.
+
+        Raises:
+            Forfeit: If the agent raised an exception, returned an invalid
+                move, or did not answer in time. The worker process is
+                stopped after a timeout, and started again by the next move.
+        """
+
+        self.latency = None
+        if self.process is None:
+            self.start()
+
+        try:
+            self.connection.send(('move', (board, positions, orientations)))
+        except OSError:
+            self.stop()
+            raise Forfeit(DIED)
+
+        t0 = time.perf_counter()
+        try:
+            move = self._receive(self.deadline)
+        finally:
+            self.latency = time.perf_counter() - t0
+
+        if move not in range(-2, 3):
+            raise Forfeit('Invalid move {!r}'.format(move))
+
+        return int(move)
+
+    def seed(self, seed):
+        """Seed the random generators of the agent, `random` and
+        `numpy.random`, which makes its moves reproducible. The worker
+        process is started if needed.
+
+        Args:
+            seed (int): The seed.
+        """
+
+        if self.process is None:
+            self.start()
+
+        try:
+            self.connection.send(('seed', seed))
+        except OSError:
+            # The next move reports that the process died
+            pass
+
+    def stop(self):
+        """Stop the worker process, without waiting for the agent."""
+
+        if self.process is not None:
+            self.process.kill()
+            self.process.join()
+            self.connection.close()
+            self.process = None
+
+    def close(self):
+        """Stop the worker process, after asking it to stop by itself."""
+
+        if self.process is not None:
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+            self.process.join(1)
+            self.stop()
+
+
+# The workers of this process, see `get_worker`
+_WORKERS = collections.OrderedDict()
+
+# The number of workers to keep per process
+MAX_WORKERS = 8
+
+
+def get_worker(agent, deadline=1.0):
+    """Return a quiet worker of an agent, reusing the workers started earlier
+    by this process. Only the most recently used workers are kept.
+
+    Args:
+        agent (str): The module name or filename of the agent.
+        deadline (float): See `AgentWorker`.
+
+    Returns:
+        worker (AgentWorker): The worker.
+    """
+
+    key = agent, deadline
+    if key in _WORKERS:
+        _WORKERS.move_to_end(key)
+        return _WORKERS[key]
+
+    while len(_WORKERS) >= MAX_WORKERS:
+        _, worker = _WORKERS.popitem(last=False)
+        worker.close()
+
+    _WORKERS[key] = AgentWorker(agent, deadline, quiet=True)
+    return _WORKERS[key]
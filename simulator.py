@@ -1,35 +1,60 @@
-import importlib
-import json
+import argparse
 import os
 import sys
 import time
 
 sys.path.append('simulator-files')
-from game import Hexatron
+from game import Hexatron, rotate
+from latency import LatencyReport
+import match
+import replay
+import tournament
+from workers import AgentWorker, Forfeit, is_timeout
 
 sys.path.append('agents')
 sys.path.append('agents/old')
 
-def run_simulation(agent_one_file, agent_two_file):
+def run_simulation(agent_one_file, agent_two_file, adjudicate=False,
+                   size=13, deadline=1.0, records='replays/replays.hxr',
+                   html=True):
     """Set up a single game, where two agents play each other.
-    A replay will be written to "replay.html".
+    A replay is written next to the records, by default to
+    "replays/replay{time_id}.html". The game is also recorded, see
+    `replay.encode`, and can be rendered again later.
 
     Args:
         agent_one_file (string): Filename for the first agent.
         agent_two_file (string): Filename for the second agent.
+        adjudicate (bool): If True, stop the game as soon as the agents can
+            no longer reach each other, and decide it from the number of
+            steps each agent can still make. See `Hexatron.adjudicate`.
+        size (int): Size of the (outer) square grid, that will contain the
+            hexagonal playing field.
+        deadline (float): The time in seconds an agent has for every move.
+            An agent that exceeds it forfeits the game. See `AgentWorker`.
+        records (str): The file to append the record of the game to.
+        html (bool): If False, only record the game, without writing the
+            replay.
+
+    Returns:
+        game (Hexatron): The finished game.
     """
 
     print('Running a simulation with "{}" vs. "{}".'.format(
         agent_one_file, agent_two_file))
 
     agent_one_module, _ = os.path.splitext(agent_one_file)
-    generator_one_module = importlib.import_module(agent_one_module)
-
     agent_two_module, _ = os.path.splitext(agent_two_file)
-    generator_two_module = importlib.import_module(agent_two_module)
+
+    # Every agent runs in a process of its own
+    workers = [AgentWorker(agent_one_module, deadline),
+               AgentWorker(agent_two_module, deadline)]
+    forfeits = [None, None]
+    latencies = [[], []]
+    played = [[], []]
 
     # Instantiate game
-    game = Hexatron(13)
+    game = Hexatron(size)
     observation = game.reset()
 
     # Play game
@@ -37,34 +62,75 @@ def run_simulation(agent_one_file, agent_two_file):
     while not done:
 
         # Generate moves
-        move1 = generator_one_module.generate_move(
-            observation['board'],
-            observation['positions'],
-            observation['orientations'])
-
-        move2 = generator_two_module.generate_move(
-            observation['board'][:, :, ::-1],
-            observation['positions'][::-1],
-            observation['orientations'][::-1])
-
-        observation, done, status = game.act(move1, move2)
-
-    # Generate replay
-    with open('simulator-files/html.template', 'r', encoding='utf8') as infile:
-        template = infile.read()
-
-    output = template.replace('{{AGENT_1}}', agent_one_module)
-    output = output.replace('{{AGENT_2}}', agent_two_module)
-
-    output = output.replace(
-        '{{GENERATED_TRAJECTORY}}',
-        json.dumps([p.trajectory for p in game.players]))
-
-    tid = int(time.time() * 1e6)
-    with open('replays/replay%d.html' % tid, 'w', encoding='utf8') as outfile:
-        outfile.write(output)
-
-    print('A replay of the simulation has been written to "replays/replay%d.html".' % tid)
+        moves = []
+        for idx, worker in enumerate(workers):
+            view = rotate(observation, idx)
+            try:
+                moves.append(worker.move(
+                    view['board'], view['positions'], view['orientations']))
+            except Forfeit as e:
+                forfeits[idx] = str(e)
+
+            # A move that forfeited counts too, a timeout with the deadline
+            if worker.latency is not None:
+                latencies[idx].append(worker.latency)
+
+        if any(forfeits):
+            break
+
+        observation, done, status = game.act(*moves)
+        for idx, move in enumerate(moves):
+            played[idx].append(move)
+
+        if adjudicate and not done:
+            done = game.adjudicate() is not None
+
+    for worker in workers:
+        worker.close()
+
+    # Record the game, which can be rendered later
+    replays = replay.ReplayFile(records)
+    number = replays.append(replay.encode(
+        size, game.start, [agent_one_module, agent_two_module], played))
+    replays.close()
+
+    print('The simulation has been recorded as game %d in "%s".' % (
+        number, records))
+
+    if html:
+        tid = int(time.time() * 1e6)
+        path = os.path.join(os.path.dirname(records), 'replay%d.html' % tid)
+        with open(path, 'w', encoding='utf8') as outfile:
+            outfile.write(replay.render(
+                game, [agent_one_module, agent_two_module]))
+
+        print('A replay of the simulation has been written to "%s".' % path)
+
+    # Keyed by side, so that both sides of a self-play game are reported
+    # on their own
+    report = LatencyReport(deadline)
+    for idx, (agent, forfeit, latency) in enumerate(zip(
+            [agent_one_module, agent_two_module], forfeits, latencies)):
+        if forfeit is not None:
+            print('"%s" forfeited the game after %d turns: %s' % (
+                agent, game.turn, forfeit))
+
+        if latency:
+            side = '%s (player %d)' % (agent, idx + 1)
+            report.add(side, latency, int(is_timeout(forfeit)))
+            utilisation = report.utilisation(side)
+            print('"%s" took at most %.1f ms per move, %.0f%% of its '
+                  'budget, with %d timeouts.' % (
+                      side, 1e3 * utilisation['max'] * deadline,
+                      100 * utilisation['max'], utilisation['timeouts']))
+
+    if game.adjudicated is not None:
+        print('The game was adjudicated after %d turns, "%s" can still '
+              'make %d steps, and "%s" %d steps.' % (
+                  game.turn, agent_one_module, game.adjudicated[0],
+                  agent_two_module, game.adjudicated[1]))
+
+    return game
 
 
 def main(argv):
@@ -75,14 +141,47 @@ def main(argv):
             always "simulator.py", the name of this script. The second element
             should be the name of the first agent's file. The final element
             should be the name of the opponent's file. Not that this can be
-            the same name as the previous file.
+            the same name as the previous file. If the second element is
+            "tournament", a round robin is played instead, see
+            `tournament.main`, or if it is "match", a match between two
+            agents, see `match.main`, or if it is "render", recorded games
+            are rendered, see `replay.main`.
     """
 
-    if len(argv) != 3:
-        print('Usage: python[3] simulator.py [agent_one] [agent_two]')
-        exit(1)
-
-    run_simulation(*argv[1:])
+    if argv[1:2] == ['tournament']:
+        tournament.main(argv[1:])
+        return
+
+    if argv[1:2] == ['match']:
+        match.main(argv[1:])
+        return
+
+    if argv[1:2] == ['render']:
+        replay.main(argv[1:])
+        return
+
+    parser = argparse.ArgumentParser(prog='python[3] simulator.py')
+    parser.add_argument('agent_one')
+    parser.add_argument('agent_two')
+    parser.add_argument(
+        '--adjudicate', action='store_true',
+        help='stop the game once the agents can no longer reach each other')
+    parser.add_argument(
+        '--size', type=int, default=13,
+        help='size of the square grid that contains the playing field')
+    parser.add_argument(
+        '--deadline', type=float, default=1.0,
+        help='seconds an agent has for every move, before it forfeits')
+    parser.add_argument(
+        '--records', default='replays/replays.hxr',
+        help='the file to append the record of the game to')
+    parser.add_argument('--no-html', action='store_true',
+                        help='only record the game, without writing the '
+                             'HTML replay')
+    args = parser.parse_args(argv[1:])
+
+    run_simulation(args.agent_one, args.agent_two, args.adjudicate, args.size,
+                   args.deadline, args.records, not args.no_html)
 
 
 if __name__ == '__main__':